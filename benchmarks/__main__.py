@@ -0,0 +1,174 @@
+"""
+Minimal runner for the benchmarks in this folder, which are written in the asv benchmark format
+(the package has no install metadata, so asv itself can't build it).
+
+Usage (from the repo root):
+    python -m benchmarks                        # run all, print a table
+    python -m benchmarks -b import -o out.json  # run benchmarks matching 'import', save results
+    python -m benchmarks --compare old.json new.json  # ratios between two saved runs, exits 1 on regressions
+
+Benchmarks follow the asv format - module level functions or class methods named
+time_* (timed in process), timeraw_* (return code that is timed in a fresh interpreter)
+and track_* (return a number), with optional setup/teardown and params/param_names.
+"""
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+REPO_ROOT = BENCH_DIR.parent
+PREFIXES = ('time_', 'timeraw_', 'track_')
+# new / old median ratio above which --compare reports a regression
+REGRESSION_FACTOR = 1.1
+
+
+def _discover(pattern: str = None):
+    """Yield (full name, owner class or None, function) of all benchmarks matching pattern."""
+    for path in sorted(BENCH_DIR.glob('bench_*.py')):
+        module = importlib.import_module(f'benchmarks.{path.stem}')
+        for name, obj in vars(module).items():
+            if inspect.isclass(obj) and obj.__module__ == module.__name__:
+                members = [(f'{path.stem}.{name}.{m}', obj, f) for m, f in vars(obj).items()
+                           if m.startswith(PREFIXES)]
+            elif inspect.isfunction(obj) and name.startswith(PREFIXES):
+                members = [(f'{path.stem}.{name}', None, obj)]
+            else:
+                continue
+            for full_name, owner, func in members:
+                if pattern is None or pattern in full_name:
+                    yield full_name, owner, func
+
+
+def _timeraw(code: str) -> float:
+    """Time the execution of code in a fresh interpreter."""
+    script = f'import time\nt = time.perf_counter()\nexec({code!r})\nprint(time.perf_counter() - t)'
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [str(REPO_ROOT),
+                                                                     os.environ.get('PYTHONPATH')]))}
+    out = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                         check=True, cwd=REPO_ROOT, env=env)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _run_one(owner, func, params: tuple, repeat: int) -> dict:
+    instance = owner() if owner else None
+    bound = func.__get__(instance) if owner else func
+    setup = getattr(instance if owner else inspect.getmodule(func), 'setup', None)
+    teardown = getattr(instance if owner else inspect.getmodule(func), 'teardown', None)
+    if setup:
+        setup(*params)
+    try:
+        if func.__name__.startswith('track_'):
+            return {'value': bound(*params)}
+        samples = []
+        for _ in range(repeat):
+            if func.__name__.startswith('timeraw_'):
+                samples.append(_timeraw(bound(*params)))
+            else:
+                t = time.perf_counter()
+                bound(*params)
+                samples.append(time.perf_counter() - t)
+        return {'min': min(samples), 'median': statistics.median(samples), 'repeat': repeat}
+    finally:
+        if teardown:
+            teardown(*params)
+
+
+def run(pattern: str = None, repeat: int = 5) -> dict:
+    results = {}
+    for full_name, owner, func in _discover(pattern):
+        holder = owner or func
+        params = getattr(holder, 'params', [])
+        params = params if params and isinstance(params[0], (list, tuple)) else [params] if params else []
+        param_names = getattr(holder, 'param_names', [f'param{i}' for i in range(len(params))])
+        for combination in itertools.product(*params):
+            key = full_name + (f'({", ".join(map(repr, combination))})' if combination else '')
+            try:
+                results[key] = {**_run_one(owner, func, combination, repeat),
+                                'params': dict(zip(param_names, map(repr, combination)))}
+            except NotImplementedError:  # asv convention for skipped parameter combinations
+                continue
+            except Exception as e:
+                results[key] = {'error': f'{type(e).__name__}: {e}'}
+            print(f'{key:<70} {_format(results[key])}', flush=True)
+    return results
+
+
+def _format(result: dict) -> str:
+    if 'error' in result:
+        return f'failed - {result["error"]}'
+    if 'value' in result:
+        return str(result['value'])
+    return f'{result["median"] * 1e3:10.2f} ms (min {result["min"] * 1e3:.2f} ms)'
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=REPO_ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def compare(old_path: str, new_path: str, factor: float = REGRESSION_FACTOR) -> bool:
+    """
+    Print new / old ratios of the benchmarks in two saved runs, return True if a time_* / timeraw_* got
+    slower than factor or a track_* value (e.g. heavy modules loaded on import) increased at all.
+    """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f'{old["commit"][:10] or old_path} -> {new["commit"][:10] or new_path}')
+    regressed = False
+    for key, result in new['results'].items():
+        before = old['results'].get(key)
+        if before is None or 'error' in result or 'error' in before:
+            continue
+        a, b = before.get('median', before.get('value')), result.get('median', result.get('value'))
+        if not isinstance(a, (int, float)) or not isinstance(b, (int, float)) or a == b:
+            ratio = 1.0
+        else:
+            ratio = b / a if a else float('inf')
+        flag = ''
+        if 'median' in result and ratio > factor:
+            flag, regressed = 'SLOWER', True
+        elif 'median' in result and ratio < 1 / factor:
+            flag = 'faster'
+        elif 'value' in result and isinstance(a, (int, float)) and isinstance(b, (int, float)) and b > a:
+            flag, regressed = f'INCREASED {a} -> {b}', True
+        print(f'{key:<70} {ratio:6.2f}x {flag}')
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-b', '--bench', help='only run benchmarks whose name contains this string')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='timing samples per benchmark')
+    parser.add_argument('-o', '--output', help='save the results as JSON to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two saved result files instead of running, exits 1 on regressions')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare) else 0)
+
+    sys.path.insert(0, str(REPO_ROOT))
+    results = run(args.bench, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'commit': _commit(), 'python': platform.python_version(),
+                       'machine': platform.node(), 'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'results': results}, f, indent=4, default=str)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Synthetic data for the benchmarks - asset catalogs, big config documents, wide DataFrames
+and a local S3 stand-in (moto).
+"""
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SEED = 0
+
+
+def wide_frame(n_rows: int, n_cols: int, n_str_cols: int = 5) -> pd.DataFrame:
+    """Numeric columns plus a few low cardinality string columns."""
+    rng = np.random.default_rng(SEED)
+    df = pd.DataFrame(rng.normal(size=(n_rows, n_cols - n_str_cols)),
+                      columns=[f'num_{i}' for i in range(n_cols - n_str_cols)])
+    for i in range(n_str_cols):
+        df[f'str_{i}'] = rng.choice([f'cat_{j}' for j in range(50)], n_rows)
+    return df
+
+
+def nested_config(n_keys: int, depth: int = 6, seed: int = SEED) -> dict:
+    """Nested experiment-config-like dict with about n_keys leaves."""
+    rng = np.random.default_rng(seed)
+    doc = {}
+    for i in range(n_keys):
+        node = doc
+        for level in range(rng.integers(1, depth)):
+            node = node.setdefault(f'section_{level}_{rng.integers(0, 8)}', {})
+        values = [float(rng.random()), int(rng.integers(0, 1000)), f'value_{i}']
+        node[f'param_{i}'] = values[rng.integers(0, len(values))]
+    return doc
+
+
+def asset_catalog(n_assets: int, n_groups: int = 20) -> Path:
+    """
+    Asset manager root folder with n_assets (empty) asset files and their metadata.json,
+    in the format written by asset_manager._save_metadata.
+    """
+    root = Path(tempfile.mkdtemp(prefix='my_utils_bench_assets_'))
+    created_at = datetime(2024, 1, 1).isoformat()
+    metadata = {}
+    for group in range(n_groups):
+        (root / f'group_{group}').mkdir()
+    for i in range(n_assets):
+        group = f'group_{i % n_groups}'
+        name = f'asset_{i}'
+        (root / group / name).touch()
+        metadata[f'{group}_{name}'] = {
+            'name': name, 'group': group, 'created_at': created_at, 'asset_type': 'parquet',
+            'description': f'synthetic asset {i}', 'custom_metadata': {'run': i % 7},
+            'relative_path': f'{group}/{name}'
+        }
+    with open(root / 'metadata.json', 'w') as f:
+        json.dump(metadata, f, indent=4)
+    return root
+
+
+def use_asset_root(root: Path):
+    """Point the asset manager at root."""
+    from my_utils.asset_man import asset_manager
+    asset_manager._settings['root_path'] = root
+
+
+def mock_s3():
+    """
+    Start a local S3 stand-in, return the started mock (call .stop() when done).
+    Raises NotImplementedError (skips the benchmark) when moto isn't installed.
+    """
+    try:
+        from moto import mock_aws
+    except ImportError:
+        try:
+            from moto import mock_s3 as mock_aws
+        except ImportError:
+            raise NotImplementedError('moto is not installed')
+
+    for var in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN'):
+        os.environ[var] = 'benchmark'
+    os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
+    mock = mock_aws()
+    mock.start()
+    return mock
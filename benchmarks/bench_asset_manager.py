@@ -0,0 +1,38 @@
+"""
+Asset manager at catalog scale - every call reads (and most write) the whole metadata.json.
+"""
+import shutil
+
+from benchmarks._synthetic import asset_catalog, use_asset_root, wide_frame
+
+
+class AssetCatalogSuite:
+    params = [1_000, 10_000, 100_000]
+    param_names = ['n_assets']
+    timeout = 600
+
+    def setup(self, n_assets):
+        from my_utils.asset_man import asset_manager
+        self.asset_manager = asset_manager
+        self.root = asset_catalog(n_assets)
+        use_asset_root(self.root)
+        self.df = wide_frame(10_000, 20)
+        asset_manager.save_asset(self.df, 'bench_frame', group='bench')
+
+    def teardown(self, n_assets):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def time_load_metadata(self, n_assets):
+        self.asset_manager._load_metadata()
+
+    def time_list_assets(self, n_assets):
+        self.asset_manager.list_assets('group_0')
+
+    def time_save_asset(self, n_assets):
+        self.asset_manager.save_asset(self.df, 'bench_save', group='bench')
+
+    def time_load_asset(self, n_assets):
+        self.asset_manager.load_asset('bench_frame', 'bench')
+
+    def track_metadata_bytes(self, n_assets):
+        return (self.root / 'metadata.json').stat().st_size
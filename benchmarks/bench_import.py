@@ -0,0 +1,61 @@
+"""
+Import time of my_utils.
+
+`python benchmarks/bench_import.py` is a regression guard - it fails when importing the package
+(or one of the light helpers) loads a heavy dependency, or takes longer than IMPORT_BUDGET seconds.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# modules that must only be loaded when an attribute that needs them is accessed
+HEAVY_MODULES = ['pandas', 'numpy', 'plotly', 'ipywidgets', 'matplotlib', 'icecream', 'boto3', 'pyarrow']
+IMPORT_BUDGET = 0.5
+
+LIGHT_IMPORTS = {
+    'package': 'import my_utils',
+    'read_json': 'from my_utils import read_json',
+}
+
+
+def _heavy_modules_loaded(code: str) -> list:
+    """Heavy modules in sys.modules after running code in a fresh interpreter."""
+    script = f'import sys, json\n{code}\nprint(json.dumps(sorted(set(sys.modules) & set({HEAVY_MODULES!r}))))'
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [str(REPO_ROOT),
+                                                                     os.environ.get('PYTHONPATH')]))}
+    out = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                         check=True, cwd=REPO_ROOT, env=env)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+class ImportSuite:
+    params = list(LIGHT_IMPORTS)
+    param_names = ['import']
+
+    def timeraw_import(self, name):
+        return LIGHT_IMPORTS[name]
+
+    def track_heavy_modules_loaded(self, name):
+        return len(_heavy_modules_loaded(LIGHT_IMPORTS[name]))
+
+
+def timeraw_import_nb_utils():
+    return 'from my_utils import DictViewer'
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, str(REPO_ROOT))
+    from benchmarks.__main__ import _timeraw
+
+    failed = False
+    for name, code in LIGHT_IMPORTS.items():
+        heavy = _heavy_modules_loaded(code)
+        seconds = min(_timeraw(code) for _ in range(3))
+        ok = not heavy and seconds <= IMPORT_BUDGET
+        failed |= not ok
+        print(f'{"ok  " if ok else "FAIL"} {code:<35} {seconds * 1e3:8.1f} ms  heavy modules: {heavy or "-"}')
+    sys.exit(1 if failed else 0)
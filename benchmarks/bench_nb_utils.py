@@ -0,0 +1,97 @@
+"""
+Notebook utilities on big inputs - the kernel side work of building the widgets
+(nothing is rendered by a browser here, outside a kernel the widgets' output goes to a dummy stdout).
+"""
+import contextlib
+import io
+
+import numpy as np
+
+from benchmarks._synthetic import wide_frame
+
+
+class _Quiet:
+    """Send what the widgets display to a dummy stdout."""
+
+    def setup(self, *params):
+        self._stdout = contextlib.redirect_stdout(io.StringIO())
+        self._stdout.__enter__()
+
+    def teardown(self, *params):
+        self._stdout.__exit__(None, None, None)
+
+
+class GBViewerSuite(_Quiet):
+    params = [1_000, 50_000]
+    param_names = ['n_groups']
+
+    def setup(self, n_groups):
+        super().setup()
+        rng = np.random.default_rng(0)
+        self.df = wide_frame(500_000, 20)
+        self.df['key'] = rng.integers(0, n_groups, len(self.df))
+
+    def time_gbviewer(self, n_groups):
+        from my_utils.jup_nb.nb_utils import GBViewer
+        GBViewer(self.df.groupby('key'))
+
+    def time_gbviewer_search(self, n_groups):
+        from my_utils.jup_nb.nb_utils import GBViewer
+        GBViewer(self.df.groupby('key')).w_search.value = '12'
+
+
+class DictViewerSuite(_Quiet):
+    def setup(self):
+        super().setup()
+        from my_utils.jup_nb.nb_utils import DictViewer
+        self.viewer = DictViewer({f'df_{i}': wide_frame(100_000, 30) for i in range(4)})
+
+    def time_switch_keys(self):
+        for key in ['df_1', 'df_0', 'df_1', 'df_2', 'df_3', 'df_0']:
+            self.viewer.w_cus.value = key
+
+
+class WideFrameSuite(_Quiet):
+    params = [[100_000, 1_000_000], [20, 200]]
+    param_names = ['n_rows', 'n_cols']
+    timeout = 600
+
+    def setup(self, n_rows, n_cols):
+        super().setup()
+        self.df = wide_frame(n_rows, n_cols)
+
+    def time_describe(self, n_rows, n_cols):
+        self.df.describe()
+
+    def time_describe_fast(self, n_rows, n_cols):
+        from my_utils.jup_nb.nb_utils import describe_fast
+        describe_fast(self.df)
+
+    def time_dataframe_viewer_sort(self, n_rows, n_cols):
+        from my_utils.jup_nb.nb_utils import DataFrameViewer
+        viewer = DataFrameViewer(self.df)
+        viewer.w_sort.value = 'num_0'
+
+    def time_sub_dfs(self, n_rows, n_cols):
+        from my_utils.jup_nb.nb_utils import sub_dfs
+        sub_dfs('a', self.df, 'b', self.df)
+
+
+class PlotSuite:
+    params = [100_000, 2_000_000]
+    param_names = ['n_points']
+
+    def setup(self, n_points):
+        import plotly.graph_objects as go
+        rng = np.random.default_rng(0)
+        x = rng.random(n_points)
+        self.fig = go.Figure(go.Scatter(x=x, y=x + rng.normal(scale=.1, size=n_points), mode='markers'))
+
+    def time_subplots_downsampled(self, n_points):
+        from my_utils.jup_nb.nb_utils import subplots
+        subplots(self.fig, self.fig, max_points=5_000)
+
+    def time_add_diagonal(self, n_points):
+        from my_utils.jup_nb.nb_utils import add_diagonal
+        add_diagonal(self.fig)
+        self.fig.data = self.fig.data[:1]
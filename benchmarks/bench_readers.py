@@ -0,0 +1,46 @@
+"""
+JSON / YAML readers and the config search helpers on big documents.
+"""
+import os
+import shutil
+import tempfile
+
+from benchmarks._synthetic import nested_config
+
+
+class ConfigFileSuite:
+    params = [1_000, 20_000, 100_000]
+    param_names = ['n_keys']
+
+    def setup(self, n_keys):
+        from my_utils import readers
+        from my_utils.jup_nb import nb_utils
+        self.readers = readers
+        self.nb_utils = nb_utils
+        self.dir = tempfile.mkdtemp(prefix='my_utils_bench_readers_')
+        self.doc = nested_config(n_keys)
+        self.json_path = os.path.join(self.dir, 'config.json')
+        self.yaml_path = os.path.join(self.dir, 'config.yaml')
+        readers.save_json(self.doc, self.json_path)
+        readers.save_yaml(self.doc, self.yaml_path)
+
+    def teardown(self, n_keys):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def time_read_json(self, n_keys):
+        self.readers.read_json(self.json_path)
+
+    def time_save_json(self, n_keys):
+        self.readers.save_json(self.doc, self.json_path)
+
+    def time_read_yaml(self, n_keys):
+        self.readers.read_yaml(self.yaml_path)
+
+    def time_build_dict_index(self, n_keys):
+        self.nb_utils.FlatDictIndex(self.doc)
+
+    def time_search_dict_index(self, n_keys):
+        self.nb_utils.get_dict_index(self.doc).search('param_1', mode='prefix', search_values=True)
+
+    def track_json_bytes(self, n_keys):
+        return os.path.getsize(self.json_path)
@@ -0,0 +1,37 @@
+"""
+S3 helpers against a local S3 stand-in (moto) - measures our per-request overhead and the number
+of round trips, not real network latency.
+"""
+import contextlib
+import io
+
+from benchmarks._synthetic import mock_s3
+
+BUCKET = 'my-utils-bench'
+
+
+class TraverseS3Suite:
+    params = [10, 100, 500]
+    param_names = ['n_models']
+    timeout = 600
+
+    def setup(self, n_models):
+        self.mock = mock_s3()
+        import boto3
+        s3 = boto3.client('s3')
+        s3.create_bucket(Bucket=BUCKET)
+        for i in range(n_models):
+            s3.put_object(Bucket=BUCKET, Key=f'flurry/model_{i}/run/exp/outputs/model.cbm', Body=b'')
+            s3.put_object(Bucket=BUCKET, Key=f'flurry/model_{i}/run/config.yaml', Body=b'a: 1\n')
+
+    def teardown(self, n_models):
+        self.mock.stop()
+
+    def time_traverse_s3_paths(self, n_models):
+        from my_utils.s3_utils import traverse_s3_paths
+        with contextlib.redirect_stdout(io.StringIO()):
+            traverse_s3_paths(f'{BUCKET}/flurry', num_levels=3)
+
+    def time_load_file_to_dict(self, n_models):
+        from my_utils.jup_nb.nb_utils import load_file_to_dict
+        load_file_to_dict(f's3://{BUCKET}/flurry/model_0/run/config.yaml')
@@ -1,50 +1,184 @@
-from .jup_nb.nb_utils import *
-from .utils import *
-from .readers import *
-from .asset_man.asset_manager import *
+"""
+Submodules (and their heavy dependencies - pandas, plotly, ipywidgets...) are imported on first
+access of one of their attributes (PEP 562), so `from my_utils import read_json` stays cheap.
+"""
+import builtins
+import importlib
+import importlib.abc
+import importlib.util
+import sys
+
+# public attribute -> submodule it is lazily imported from
+_LAZY_ATTRS = {
+    **dict.fromkeys(['DictViewer', 'GBViewer', 'OutputWrapper', 'DataFrameViewer', 'WEBGL_MIN_POINTS',
+                     'lttb_indices', 'minmax_indices', 'optimize_fig', 'subplots', 'sub_dfs', 'add_diagonal',
+                     'square_fig', 'col_intersection', 'KeyOverlap', 'key_overlap', 'describe_fast',
+                     'df_sneak_peak', 'load_file_to_dict', 'FlatDictIndex', 'get_dict_index',
+                     'MAX_PRETTY_PRINT_CHARS', 'pretty_print_dict_with_filter'], '.jup_nb.nb_utils'),
+    **dict.fromkeys(['safe_divide', 'pd_float_format', 'pd_df_num_rows', 'pd_df_row_width', 'col_by_kw',
+                     'grouped', 'iter_chunks', 'parallel_map', 'catboost_feature_importance',
+                     'catboost_feature_importances', 'rank_feature_importances',
+                     'FEATURE_IMPORTANCE_CACHE_DIR'], '.utils'),
+    **dict.fromkeys(['save_json', 'read_json', 'read_yaml', 'save_yaml', 'reindent_yaml',
+                     'iter_parquet_chunks', 'parquet_min_max'], '.readers'),
+    **dict.fromkeys(['get_settings', 'save_asset', 'load_asset', 'list_assets', 'update_metadata',
+                     'create_group', 'remove_group', 'sync_metadata', 'delete_asset', 'update_settings',
+                     'list_groups', 'get_asset_path', 'load_asset_chunks', 'asset_min_max',
+                     'catboost_asset_paths'], '.asset_man.asset_manager'),
+    **dict.fromkeys(['AssetType', 'AssetMetadata'], '.asset_man.asset_man_helpers'),
+    **dict.fromkeys(['CACHE_GROUP', 'cached_asset'], '.asset_man.asset_cache'),
+    **dict.fromkeys(['value_counts_approx'], '.jup_nb.pandas_utils'),
+    **dict.fromkeys(['my_utils_profile'], '.profiling'),
+    # re-exported for `from my_utils import *` in notebooks (the submodules' star imports used to export them)
+    **dict.fromkeys(['display', 'HTML', 'Markdown'], 'IPython.display'),
+    **dict.fromkeys(['Dropdown', 'HBox', 'Label', 'Layout', 'Output', 'VBox'], 'ipywidgets'),
+    **dict.fromkeys(['Any', 'Dict', 'Optional', 'Union'], 'typing'),
+    **dict.fromkeys(['dumps'], 'json'),
+    **dict.fromkeys(['DataFrameGroupBy'], 'pandas.core.groupby'),
+    **dict.fromkeys(['make_subplots'], 'plotly.subplots'),
+    **dict.fromkeys(['asdict'], 'dataclasses'),
+    **dict.fromkeys(['datetime'], 'datetime'),
+    **dict.fromkeys(['Path'], 'pathlib'),
+    **dict.fromkeys(['color_rows_by_group'], '.asset_man.asset_man_helpers'),
+}
+
+# public module alias -> module, lazily imported like _LAZY_ATTRS
+_LAZY_MODULES = {'np': 'numpy', 'pd': 'pandas', 'go': 'plotly.graph_objects', 'plotly': 'plotly',
+                 'json': 'json', 'os': 'os', 'yaml': 'yaml', 'shutil': 'shutil'}
+
+__all__ = list(_LAZY_ATTRS) + list(_LAZY_MODULES) + ['doc']
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        value = importlib.import_module(_LAZY_MODULES[name])
+    elif name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | set(_LAZY_MODULES))
+
+
+class _PandasMethodsHook(importlib.abc.MetaPathFinder):
+    """
+    Sets the custom pandas DataFrame and Series methods (jup_nb.pandas_utils) right after pandas is
+    first imported, without importing pandas ourselves.
+    """
+    def find_spec(self, fullname, path, target=None):
+        if fullname != 'pandas':
+            return None
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec('pandas')
+        if spec is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+        exec_module = spec.loader.exec_module
+
+        def exec_and_set_methods(module):
+            exec_module(module)
+            importlib.import_module('.jup_nb.pandas_utils', __name__)
+
+        spec.loader.exec_module = exec_and_set_methods
+        return spec
+
+
+if 'pandas' in sys.modules:
+    import my_utils.jup_nb.pandas_utils  # sets pandas DataFrame methods
+else:
+    sys.meta_path.insert(0, _PandasMethodsHook())
+
+class _LazyIc:
+    """Stand-in for icecream's ic builtin - icecream is imported (and installed) on first use."""
 
-from IPython.display import Markdown, display
+    @staticmethod
+    def _load():
+        try:
+            from icecream import install
+        except ImportError as e:
+            raise ImportError("ic requires the icecream library.") from e
+        install()
+        return builtins.ic
 
-import my_utils.jup_nb.pandas_utils  # sets pandas DataFrame methods
+    def __call__(self, *args):
+        ic = self._load()
+        try:
+            # ic reads the source of its arguments from the caller's frame, which would be this method
+            if ic.enabled:
+                ic.outputFunction(ic._format(sys._getframe(1), *args))
+        except AttributeError:  # icecream internals changed
+            return ic(*args)
+        return None if not args else args[0] if len(args) == 1 else args
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+
+if not hasattr(builtins, 'ic'):
+    builtins.ic = _LazyIc()
 
-try:
-    from icecream import install
-    install()
-except ImportError:
-    print('Icecream not installed')
 
 def doc():
     """
     Make sure the there is no newline after the first triple quotes,
     and that the following lines are flush with the left margin.
     """
+    from IPython.display import Markdown, display
+
     docstring = """ # MyPackage Documentation
 Welcome to the **MyUtils** guide! Here's what you can find in this package:
 ## Readers
 * **[load\save]_[json\yaml]**: Read and save JSON and YAML files, doesn't support cloud
 * **pretty_print_dict_with_filter**: - Pretty print a dictionary with a dict key filter. Supports S3 paths.
+* **iter_parquet_chunks**: - Iterate over a parquet file or partitioned folder as DataFrame chunks
+* **FlatDictIndex / get_dict_index**: - Cached flattened index of a nested dict, substring/prefix/regex search on keys and values
 
 ## Utils
 * **pd_float_format**: Change how numbers are displayed in a DataFrame
 * **pd_df_num_rows**: Set the number of rows to display in a DataFrame
 * **col_by_kw**: Return list of columns in df that contain a keyword
 * **grouped**: Return an iterator that produces n-tuples by grouping elements from the input iterable
+* **iter_chunks**: Split DataFrames, arrays and sequences into zero-copy chunks, including the tail
+* **parallel_map**: Map a function over chunks in threads or processes (arrays via shared memory), results in order
 * **DictViewer:** - Display dict values according to dropdown of keys. Useful for dicts of dataframes
 * **GBViewer:** - Group-by viewer - nice display for pandas GroupBy objects in jupyter notebook.
 * **OutputWrapper:** - Useful for converting dataframes to ipywidgets that can be displayed inside a VBox, etc.
+* **DataFrameViewer:** - Paged dataframe widget with kernel-side sort and filter, for big dataframes
 * **catboost_feature_importance**: Return a DataFrame with feature importance from a CatBoost model
+* **catboost_feature_importances**: Models x features importance table of many models, loaded in parallel and cached
+* **rank_feature_importances**: Aggregate rankings (mean importance, mean/median rank) of an importance table
+
+## Asset manager
+* **cached_asset**: Decorator - persistently memoize expensive function results as assets
+* **get_asset_path / load_asset_chunks**: Path of an asset / iterate over a parquet asset in chunks
+* **catboost_asset_paths**: Paths of the CatBoost model assets, for catboost_feature_importances
 
 ## DataFrame
 * **col_intersect**: Return the intersection of two cols
+* **key_overlap**: Vectorized intersection/difference counts, coverage and samples of join keys (composite and chunked)
 * **sub_dfs**: Stack pandas dataframes side by side with as many rows as needed based on
+* **df_sneak_peak**: Display head, describe, dtypes and shape of a dataframe
+* **describe_fast**: Parallel, sample based describe with null counts and memory for huge dataframes
 * **subplots**: Create a subplot figure from a list of figures with two columns
+* **optimize_fig**: Downsample (LTTB / min-max) and switch to WebGL scatter traces with many points
 
 ## DataFrame\Series custom methods
-* **vc**: value_counts alias
+* **vc**: value_counts alias, top=k for fast top values (multi-column for DataFrames), approx=True for bounded memory
 * **vcn**: value_counts with normalize=True
+* **value_counts_approx**: Approximate top value counts over chunks, parquet files or parquet assets
 * **flatten_column_multi_index**: Flatten column multi-index
-* **merge_left_with_indicator**: Merge two dataframes with a left join and indicator column
-* **df_min_max**: Return the min and max values of a column in a DataFrame
+* **shrink**: Downcast numeric and categorize string columns, with a per-column memory report
+* **merge_left_with_indicator**: Merge two dataframes with a left join and print the match counts
+* **merge_left_chunked**: Left merge with a right table too big for memory (chunks or parquet file/asset)
+* **min_max**: Return the min and max values of a Series or of DataFrame columns, in one pass
+* **parquet_min_max / asset_min_max**: min and max of parquet file/asset columns from the footer statistics
+
+## Profiling
+* **from my_utils import profiling**: Opt-in call counts, wall time, bytes read/written and S3 requests of the hot paths (enable, report, add_exporter)
+* **%my_utils_profile on/off/reset/show**: Per cell breakdown of the instrumented calls (magic registered by main_ext)
 
 #### main_ext.py - Jupyter Notebook Extension
 
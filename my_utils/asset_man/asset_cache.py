@@ -0,0 +1,223 @@
+import functools
+import hashlib
+import inspect
+import pickle
+import re
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from my_utils.asset_man.asset_manager import (_get_root_path, _initialize_storage, _load_metadata,
+                                              delete_asset, load_asset, save_asset)
+from my_utils.asset_man.asset_man_helpers import AssetType
+
+# Group (folder) cached results are saved in
+CACHE_GROUP = 'cached_assets'
+
+
+def _hash_value(h, value: Any):
+    """Feed value into the hash object h. DataFrames and numpy arrays are hashed by content."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        h.update(type(value).__name__.encode())
+        dtypes = value.dtypes if isinstance(value, pd.DataFrame) else [value.dtype]
+        h.update(repr(list(dtypes)).encode())
+        if isinstance(value, pd.DataFrame):
+            h.update(repr(list(value.columns)).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+        except TypeError:  # unhashable cells (lists, dicts...)
+            h.update(pickle.dumps(value))
+    elif isinstance(value, np.ndarray):
+        h.update(f'ndarray{value.dtype}{value.shape}'.encode())
+        if value.dtype.hasobject:
+            h.update(pickle.dumps(value))
+        else:
+            h.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, (list, tuple)):
+        h.update(f'{type(value).__name__}{len(value)}'.encode())
+        for v in value:
+            _hash_value(h, v)
+    elif isinstance(value, dict):
+        h.update(f'dict{len(value)}'.encode())
+        for k, v in value.items():
+            _hash_value(h, k)
+            _hash_value(h, v)
+    elif isinstance(value, (set, frozenset)):
+        # set iteration (and pickle) order depends on the per process string hash seed
+        h.update(f'{type(value).__name__}{len(value)}'.encode())
+        for digest in sorted(_digest(v) for v in value):
+            h.update(digest)
+    elif inspect.isfunction(value) or inspect.ismethod(value):
+        _hash_function(h, value)
+    else:
+        try:
+            h.update(pickle.dumps(value))
+        except Exception as e:
+            raise TypeError(f'cached_asset can not hash an argument of type {type(value).__name__} '
+                            f'deterministically') from e
+
+
+def _digest(value: Any) -> bytes:
+    h = hashlib.sha1()
+    _hash_value(h, value)
+    return h.digest()
+
+
+def _code_bytes(code) -> bytes:
+    """Bytecode and constants of a code object, nested code objects (lambdas, comprehensions) included."""
+    consts = [_code_bytes(c) if inspect.iscode(c) else repr(c).encode() for c in code.co_consts]
+    return code.co_code + repr(code.co_names).encode() + b''.join(consts)
+
+
+def _hash_function(h, func: Callable, _seen: set = None):
+    """
+    Hash a function (or bound method) by its code, defaults and closure values rather than by
+    reference, so different lambdas / local functions never share a key.
+    """
+    if inspect.ismethod(func):
+        _hash_value(h, func.__self__)
+        func = func.__func__
+    _seen = _seen or set()
+    if id(func) in _seen:  # recursive local function
+        return
+    _seen.add(id(func))
+    h.update(f'function{func.__module__}.{func.__qualname__}'.encode())
+    h.update(_code_bytes(func.__code__))
+    _hash_value(h, func.__defaults__)
+    _hash_value(h, func.__kwdefaults__)
+    for cell in func.__closure__ or ():
+        try:
+            contents = cell.cell_contents
+        except ValueError:  # empty cell
+            continue
+        if inspect.isfunction(contents):
+            _hash_function(h, contents, _seen)
+        else:
+            _hash_value(h, contents)
+
+
+def _code_hash(func: Callable) -> str:
+    """Hash of the function source, falls back to the bytecode when the source is unavailable."""
+    try:
+        code = inspect.getsource(func).encode()
+    except (OSError, TypeError):
+        code = _code_bytes(func.__code__)
+    return hashlib.sha1(code).hexdigest()
+
+
+def _args_hash(signature: inspect.Signature, args: tuple, kwargs: dict) -> str:
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    h = hashlib.sha1()
+    for name, value in bound.arguments.items():
+        h.update(name.encode())
+        _hash_value(h, value)
+    return h.hexdigest()
+
+
+def _func_id(func: Callable) -> str:
+    return re.sub(r'\W', '_', f'{func.__module__}.{func.__qualname__}')
+
+
+def _func_entries(metadata: Dict[str, Dict], group: str, func_id: str) -> Dict[str, Dict]:
+    """Metadata entries (by metadata key) of results cached for func_id."""
+    return {key: data for key, data in metadata.items()
+            if data['group'] == group and data['custom_metadata'].get('cached_func') == func_id}
+
+
+def _entry_size(data: Dict) -> int:
+    file_path = _get_root_path() / data['relative_path']
+    return file_path.stat().st_size if file_path.exists() else 0
+
+
+def _evict(group: str, func_id: str, max_size_mb: float, keep: str):
+    """Delete the oldest cached results of func_id until they take less than max_size_mb."""
+    entries = _func_entries(_load_metadata(), group, func_id)
+    sizes = {key: _entry_size(data) for key, data in entries.items()}
+    total = sum(sizes.values())
+    for key in sorted(entries, key=lambda k: entries[k]['created_at']):
+        if total <= max_size_mb * 2 ** 20:
+            break
+        if key == keep:
+            continue
+        delete_asset(key)
+        total -= sizes[key]
+
+
+def _pickle_load(path) -> Any:
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _pickle_dump(obj: Any, path):
+    with open(path, 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def cached_asset(func: Callable = None, *, group: str = CACHE_GROUP,
+                 max_size_mb: Optional[float] = None):
+    """
+    Decorator - persistently memoize a function's results as assets.
+    The cache key is a hash of the function source and its arguments (DataFrames and numpy arrays
+    are hashed by content, functions by their code), so results are invalidated when the code changes.
+    Arguments that can't be hashed deterministically raise a TypeError.
+    DataFrames are saved as parquet, anything else is pickled.
+
+    Usage example:
+        @cached_asset
+        def build_features(df, window=7): ...
+
+        @cached_asset(max_size_mb=2000)
+        def fit_model(train_df): ...
+
+        build_features.clear_cache()  # delete all cached results of the function
+
+    :param group: asset group to save the results in
+    :param max_size_mb: if given, the oldest results of the function are evicted to keep them
+                        below this size (results of other functions in the group are never evicted)
+    """
+    if func is None:
+        return functools.partial(cached_asset, group=group, max_size_mb=max_size_mb)
+
+    signature = inspect.signature(func)
+    func_id = _func_id(func)
+    code_hash = _code_hash(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        name = f'{func_id}_{code_hash[:12]}_{_args_hash(signature, args, kwargs)[:16]}'
+        key = f'{group}_{name}'
+        _initialize_storage()
+        metadata = _load_metadata()
+        if key in metadata and (_get_root_path() / metadata[key]['relative_path']).exists():
+            load_function = None if metadata[key]['asset_type'] == AssetType.PARQUET else _pickle_load
+            return load_asset(name, group, load_function=load_function)
+
+        result = func(*args, **kwargs)
+
+        # results of older versions of the function can never be hit again
+        for stale_key, data in _func_entries(metadata, group, func_id).items():
+            if data['custom_metadata'].get('code_hash') != code_hash:
+                delete_asset(stale_key)
+
+        custom_metadata = {'cached_func': func_id, 'code_hash': code_hash}
+        if isinstance(result, pd.DataFrame):
+            save_asset(result, name, AssetType.PARQUET, description=f'cached result of {func_id}',
+                       group=group, custom_metadata=custom_metadata)
+        else:
+            save_asset(result, name, AssetType.OTHER, description=f'cached result of {func_id}',
+                       group=group, custom_metadata=custom_metadata, save_function=_pickle_dump)
+
+        if max_size_mb is not None:
+            _evict(group, func_id, max_size_mb, keep=key)
+        return result
+
+    def clear_cache():
+        """Delete all cached results of the function."""
+        _initialize_storage()
+        for key in _func_entries(_load_metadata(), group, func_id):
+            delete_asset(key)
+
+    wrapper.clear_cache = clear_cache
+    return wrapper
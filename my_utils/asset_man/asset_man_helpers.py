@@ -2,12 +2,12 @@ from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from typing import Any, Dict
-import matplotlib.pyplot as plt
 import numpy as np
 
 
 def muted_pastel_colors(n):
     """Generate n distinct muted pastel colors for dark themes."""
+    import matplotlib.pyplot as plt
     base_colors = plt.cm.Pastel1(np.linspace(0, 1, n))
     return [(r * 0.7, g * 0.7, b * 0.7, 1) for r, g, b, _ in base_colors]
 
@@ -49,7 +49,7 @@ class AssetType(Enum):
 class AssetMetadata:
     name: str
     group: str
-    created_at: str
+    created_at: datetime
     asset_type: AssetType
     description: str
     custom_metadata: Dict[str, Any]
@@ -8,6 +8,7 @@ import pandas as pd
 from typing import Dict, Any, Optional
 
 from my_utils.asset_man.asset_man_helpers import AssetMetadata, AssetType, color_rows_by_group
+from my_utils.profiling import count_file, instrument
 
 
 def get_settings() -> Dict[str, Any]:
@@ -17,12 +18,14 @@ def get_settings() -> Dict[str, Any]:
     with open(settings_fpath, 'r') as f:
         return json.load(f)
 
-# Global settings
-_settings = {'root_path': get_settings()['assets_root']}
+# Global settings, loaded from the settings file on first access
+_settings = {}
 
 
 def _get_root_path() -> Path:
     """Get the current root path."""
+    if 'root_path' not in _settings:
+        _settings['root_path'] = get_settings()['assets_root']
     return Path(_settings['root_path'])
 
 
@@ -41,10 +44,12 @@ def _initialize_storage():
         _save_metadata({})
 
 
+@instrument
 def _load_metadata() -> Dict[str, Dict]:
     """Load the metadata from the JSON file."""
     metadata_file = _get_metadata_file()
     if metadata_file.exists():
+        count_file(metadata_file)
         with open(metadata_file, 'r') as f:
             data = json.load(f)
             # Convert string dates back to datetime objects and asset types to enum
@@ -55,6 +60,7 @@ def _load_metadata() -> Dict[str, Dict]:
     return {}
 
 
+@instrument
 def _save_metadata(metadata: Dict[str, Dict]):
     """Save the metadata to the JSON file."""
     # Convert datetime objects to ISO format strings and enum to string for JSON serialization
@@ -69,8 +75,10 @@ def _save_metadata(metadata: Dict[str, Dict]):
 
     with open(_get_metadata_file(), 'w') as f:
         json.dump(serializable_metadata, f, indent=4)
+    count_file(_get_metadata_file(), 'bytes_written')
 
 
+@instrument
 def save_asset(
         asset_data: Any,
         name: str,
@@ -78,7 +86,8 @@ def save_asset(
         description: str = "",
         group: str = None,
         custom_metadata: Dict[str, Any] = None,
-        save_function: callable = None
+        save_function: callable = None,
+        shrink: bool = False
 ):
     """
     Save an asset with its metadata.
@@ -91,6 +100,7 @@ def save_asset(
         group: Optional group (folder) to save the asset in
         custom_metadata: Optional dictionary of custom metadata
         save_function: Optional custom function to save the asset
+        shrink: Reduce the memory of a DataFrame (DataFrame.shrink) before saving it
     """
     _initialize_storage()
     metadata = _load_metadata()
@@ -99,6 +109,10 @@ def save_asset(
     if isinstance(asset_type, str):
         asset_type = AssetType.from_string(asset_type)
 
+    if shrink and isinstance(asset_data, pd.DataFrame):
+        from my_utils.jup_nb.pandas_utils import shrink as shrink_df
+        asset_data = shrink_df(asset_data, verbose=False)
+
     if asset_type is None:
        if hasattr(asset_data, 'to_parquet'):
           asset_type = AssetType.PARQUET
@@ -136,12 +150,13 @@ def save_asset(
         asset_data.save_model(save_path)
     else:
         raise ValueError('Unknown file type')
+    count_file(save_path, 'bytes_written')
 
     # Save metadata
     asset_metadata = AssetMetadata(
             name=name,
             group=group,
-            created_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            created_at=datetime.now(),
             asset_type=asset_type,
             description=description,
             custom_metadata=custom_metadata or {},
@@ -152,6 +167,7 @@ def save_asset(
     _save_metadata(metadata)
 
 
+@instrument
 def load_asset(name: str, group: Optional[str], load_function: callable = None) -> Any:
     """Load an asset by name."""
     _initialize_storage()
@@ -164,6 +180,7 @@ def load_asset(name: str, group: Optional[str], load_function: callable = None)
 
     asset_data = metadata[name]
     file_path = _get_root_path() / asset_data['relative_path']
+    count_file(file_path)
 
     if load_function:
         return load_function(file_path)
@@ -197,6 +214,55 @@ def load_asset(name: str, group: Optional[str], load_function: callable = None)
             return f.read()
 
 
+def get_asset_path(name: str, group: Optional[str] = None) -> Path:
+    """Get the file path of an asset by name."""
+    _initialize_storage()
+    metadata = _load_metadata()
+    if group:
+        name = f"{group}_{name}"
+
+    if name not in metadata:
+        raise ValueError(f"Asset '{name}' not found")
+    return _get_root_path() / metadata[name]['relative_path']
+
+
+def load_asset_chunks(name: str, group: Optional[str], batch_size: int = 1_000_000, columns: list = None):
+    """Iterate over a parquet asset as DataFrame chunks of up to batch_size rows."""
+    from my_utils.readers import iter_parquet_chunks
+
+    _initialize_storage()
+    metadata = _load_metadata()
+    key = f"{group}_{name}" if group else name
+    if key in metadata and metadata[key]['asset_type'] != AssetType.PARQUET:
+        raise ValueError(f"Asset '{key}' is not a parquet asset")
+    return iter_parquet_chunks(get_asset_path(name, group), batch_size, columns)
+
+def asset_min_max(name: str, group: Optional[str], columns: list = None) -> pd.DataFrame:
+    """min and max of the columns of a parquet asset, from the parquet statistics without reading rows."""
+    from my_utils.readers import parquet_min_max
+
+    _initialize_storage()
+    metadata = _load_metadata()
+    key = f"{group}_{name}" if group else name
+    if key in metadata and metadata[key]['asset_type'] != AssetType.PARQUET:
+        raise ValueError(f"Asset '{key}' is not a parquet asset")
+    return parquet_min_max(str(get_asset_path(name, group)), columns)
+
+def catboost_asset_paths(group_name: Optional[str] = None) -> Dict[str, str]:
+    """Asset key -> model file path of the CatBoost model assets (of a group)."""
+    _initialize_storage()
+    paths = {}
+    for name, data in _load_metadata().items():
+        if data['asset_type'] != AssetType.CATBOOST_MODEL or (group_name and data['group'] != group_name):
+            continue
+        file_path = _get_root_path() / data['relative_path']
+        # save_asset adds the .cbm suffix to the file but not to relative_path
+        if not file_path.exists() and file_path.with_name(file_path.name + '.cbm').exists():
+            file_path = file_path.with_name(file_path.name + '.cbm')
+        paths[name] = str(file_path)
+    return paths
+
+@instrument
 def list_assets(group_name: Optional[str]) -> pd.DataFrame:
     """Display all assets in a formatted table."""
     _initialize_storage()
@@ -5,37 +5,79 @@ This runs some common code for notebooks.
 Usage: When in IPython notebook, run
 
     %load_ext main_ext
+
+Also registers the %my_utils_profile magic (see my_utils.profiling).
 """
+import importlib
+import importlib.util
+import sys
 
 
 def load_ipython_extension(ipython):
     """
     :type ipython: ipykernel.zmqshell.ZMQInteractiveShell
     """
+    from my_utils.profiling import my_utils_profile
+    ipython.register_magic_function(my_utils_profile, 'line')
     ipython.run_cell(
         _main()
     )
     return
 
 
+class _LazyModule:
+    """
+    Stand-in for a module in the notebook namespace, the module is imported on first attribute access
+    and replaces the stand-in. (importlib's LazyLoader doesn't work here - autoreload touches every
+    module in sys.modules after each cell, which loads them.)
+    """
+    def __init__(self, name: str, alias: str, namespace: dict):
+        self._name, self._alias, self._namespace = name, alias, namespace
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        if self._namespace.get(self._alias) is self:
+            self._namespace[self._alias] = module
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f'<{self._name}, imported on first use>'
+
+
+def _lazy_imports(namespace: dict, **modules):
+    """Bind alias=module_name stand-ins in namespace, return the top level packages that aren't installed."""
+    missing = []
+    for alias, name in modules.items():
+        package = name.split('.')[0]
+        if name not in sys.modules and importlib.util.find_spec(package) is None:
+            missing.append(package)
+            continue
+        namespace[alias] = sys.modules.get(name) or _LazyModule(name, alias, namespace)
+    return sorted(set(missing))
+
+
 def _main():
+    # numpy, pandas and ipywidgets are needed right away (pandas options, star import),
+    # the rest is imported on first use
     return """
     %reload_ext autoreload
     %autoreload 2
 
-    import numpy as np, 
-    import pandas as pd, 
-    import matplotlib.pyplot as plt
-    import plotly.express as px
-    import plotly.graph_objects as go
+    import numpy as np
+    import pandas as pd
+    from my_utils.jup_nb.main_ext import _lazy_imports
+    _missing = _lazy_imports(globals(), plt='matplotlib.pyplot', px='plotly.express', go='plotly.graph_objects',
+                             requests='requests')
+    if _missing:
+        print(f'Not installed: {", ".join(_missing)}')
 
-    import json, os, sys, tempfile, requests
+    import json, os, sys, tempfile
     from collections import *
     from operator import *
     from itertools import *
     from ipywidgets import *
 
-    from my_utils.numbers import *
+    from my_utils.utils import *
     from my_utils.readers import *
 
     pd_float_format(3)
@@ -44,7 +86,8 @@ def _main():
     pd.options.plotting.backend = "plotly"
     
     print('===============')
-    print('Loaded: numpy, pandas, matplotlib, plotly(px, go), ipywidgets, json, os, sys, tempfile, requests')
+    print('Loaded: numpy, pandas, ipywidgets, json, os, sys, tempfile')
+    print('Loaded on first use: matplotlib(plt), plotly(px, go), requests')
     print('Loaded all from: collections, itertools, operator')
     print('===============')
     print(f'interpreter path: {sys.executable}')
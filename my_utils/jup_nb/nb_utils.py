@@ -1,35 +1,57 @@
+import html
 import json
+import re
 import yaml
 import os
 
 import numpy as np
-from typing import Any, Union
+from collections import OrderedDict
+from collections.abc import Mapping
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional, Union
 from json import dumps
 
 from IPython.display import display, HTML, Markdown
 import pandas as pd
 import plotly.graph_objects
 from IPython.core.display import display
-from ipywidgets import Dropdown, HBox, Label, Layout, Output, VBox
+from ipywidgets import Accordion, Button, Dropdown, HBox, IntText, Label, Layout, Output, Text, VBox
 from pandas.core.groupby import DataFrameGroupBy
 from plotly.subplots import make_subplots
 import plotly.graph_objects as go
 
+from ..profiling import count, count_file, instrument, watch_s3
 from ..utils import grouped
+from .pandas_utils import _as_list
 
 
 class DictViewer(VBox):
     """
     Display dict values according to dropdown of keys.
-    Useful for dicts of dataframes
+    Useful for dicts of dataframes.
+    Rendered values are cached per key, DataFrames/Series longer than MAX_ROWS are shown
+    as a head/tail preview with a "show more" button.
     """
     # lists above this size will be displayed as-is
     MAX_LIST_LEN = 20
-
-    def __init__(self, datadict: dict):
+    # DataFrames/Series longer than this are shown as a preview
+    MAX_ROWS = 1000
+    # number of head (and tail) rows in a preview, doubled on each "show more"
+    PREVIEW_ROWS = 10
+    # max total size of the cached rendered outputs (in characters)
+    CACHE_MAX_SIZE = 50_000_000
+
+    def __init__(self, datadict: Mapping, options=None):
+        """
+        :param datadict: dict (or any Mapping) to display
+        :param options: keys to show in the dropdown, defaults to all keys
+        """
         self.d = datadict
+        self._cache = OrderedDict()
 
-        self.w_cus = Dropdown(options=self.d.keys())
+        self.w_cus = Dropdown(options=self.d.keys() if options is None else options)
         self.w_cus.observe(self.on_key_change, 'value')
         self.w_out = Output()
         self.selected_val = None
@@ -39,37 +61,144 @@ class DictViewer(VBox):
         ])
         self.on_key_change()
 
+    @instrument
     def on_key_change(self, *_):
-        self.w_out.clear_output()
-        v = self.d[self.w_cus.value]
+        key = self.w_cus.value
+        if key is None:  # no options
+            self.selected_val = None
+            self._show(Output())
+            return
+        v = self.d[key]
         self.selected_val = v
 
-        with self.w_out:
-            display(DictViewer(v) if isinstance(v, dict) else v)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+        else:
+            self._cache[key] = self._render(v)
+        self._show(self._cache[key])
+        self._trim_cache()
+
+    def _show(self, out: Output):
+        """Replace the displayed output (always the last child) with out."""
+        self.w_out = out
+        self.children = self.children[:-1] + (out,)
+
+    @instrument
+    def _render(self, v: Any, out: Output = None) -> Output:
+        out = out or Output()
+        if isinstance(v, dict):
+            out.append_display_data(DictViewer(v))
+        elif isinstance(v, (pd.DataFrame, pd.Series)) and len(v) > self.MAX_ROWS:
+            self._render_preview(v, out, self.PREVIEW_ROWS)
+        else:
+            out.append_display_data(v)
+        return out
+
+    def _render_preview(self, v: Union[pd.DataFrame, pd.Series], out: Output, n_rows: int):
+        out.outputs = ()
+        if 2 * n_rows >= len(v):
+            with pd.option_context('display.max_rows', len(v)):
+                out.append_display_data(v)
+            return
+
+        with pd.option_context('display.max_rows', 2 * n_rows + 1):
+            out.append_display_data(pd.concat([v.head(n_rows), v.tail(n_rows)]))
+        show_more = Button(description='show more')
+
+        def on_show_more(_):
+            self._render_preview(v, out, 2 * n_rows)
+            self._trim_cache()
+
+        show_more.on_click(on_show_more)
+        out.append_display_data(HBox([Label(f'shape: {v.shape}, showing first and last {n_rows} rows'),
+                                      show_more]))
+
+    @staticmethod
+    def _output_size(out: Output) -> int:
+        return sum(len(v) for o in out.outputs for v in o.get('data', {}).values() if isinstance(v, str))
+
+    def _trim_cache(self):
+        """Evict the least recently shown outputs until the cache is below CACHE_MAX_SIZE."""
+        total = sum(self._output_size(out) for out in self._cache.values())
+        while total > self.CACHE_MAX_SIZE and len(self._cache) > 1:
+            _, out = self._cache.popitem(last=False)
+            total -= self._output_size(out)
+            out.close()
 
     def display_all(self):
-        kids = []
-        for name, v in self.d.items():
-            o = Output()
-            with o:
-                display(v)
-            kids += [Label(name), o]
-        return VBox(kids)
+        """
+        Return an accordion of all the values, each value is rendered when it is first expanded.
+        """
+        keys = list(self.d.keys())
+        acc = Accordion(children=[Output() for _ in keys], selected_index=None)
+        for i, name in enumerate(keys):
+            acc.set_title(i, str(name))
+
+        def on_expand(change):
+            i = change['new']
+            if i is not None and not acc.children[i].outputs:
+                self._render(self.d[keys[i]], acc.children[i])
+
+        acc.observe(on_expand, 'selected_index')
+        return acc
+
+
+class _LazyGroups(Mapping):
+    """
+    Read-only mapping of str(group key) -> group DataFrame.
+    Only the group indices are kept, each group is built when it is accessed.
+    """
+    def __init__(self, groupby: DataFrameGroupBy, dropna=False):
+        self._obj = getattr(groupby, '_selected_obj', groupby.obj)
+        self._indices = groupby.indices
+        self._keys = {self._label(k): k for k in self._indices}
+        self._dropna = dropna
+
+    @staticmethod
+    def _label(key) -> str:
+        """str of the key as iterating the groupby gives it - numpy scalars in tuples as python values."""
+        if isinstance(key, tuple):
+            key = tuple(v.item() if isinstance(v, np.generic) else v for v in key)
+        return str(key)
+
+    def __getitem__(self, key: str) -> pd.DataFrame:
+        df = self._obj.take(self._indices[self._keys[key]])
+        return df.dropna(how='all', axis=1) if self._dropna else df
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
 
 
 class GBViewer(DictViewer):
     """
     Group-by viewer - nice display for pandas GroupBy objects in jupyter notebook.
+    Groups are built only when selected, type in the search box to filter the group keys.
 
     Usage example (in jupyter notebook):
         GBViewer(df.groupby('some-col'))
     """
+    # max number of group keys shown in the dropdown
+    MAX_OPTIONS = 500
+
     def __init__(self, groupby: DataFrameGroupBy, dropna=False):
-        super().__init__({str(k): self._dropna(v, dropna) for k, v in groupby})
+        groups = _LazyGroups(groupby, dropna)
+        self._all_keys = list(groups)
+        super().__init__(groups, options=self._all_keys[:self.MAX_OPTIONS])
 
-    @staticmethod
-    def _dropna(df, shoulddrop=False):
-        return df.dropna(how='all', axis=1) if shoulddrop else df
+        self.w_search = Text(placeholder=f'search {len(self._all_keys)} groups...')
+        self.w_search.observe(self.on_search_change, 'value')
+        self.children = (self.w_search,) + self.children
+
+    def on_search_change(self, *_):
+        query = self.w_search.value
+        matches = (k for k in self._all_keys if query in k)
+        self.w_cus.options = list(islice(matches, self.MAX_OPTIONS))
+        # after a search without matches the dropdown value stays None
+        if self.w_cus.value not in self.w_cus.options and self.w_cus.options:
+            self.w_cus.value = self.w_cus.options[0]
 
 
 class OutputWrapper(Output):
@@ -95,10 +224,226 @@ class OutputWrapper(Output):
                 display(self.obj)
 
 
-def subplots(*figs) -> plotly.graph_objects.Figure:
+class DataFrameViewer(VBox):
+    """
+    Paged dataframe widget - only the visible window of rows and columns is sent to the browser,
+    sorting and filtering (a DataFrame.eval expression) are computed in the kernel.
+    Drop-in for OutputWrapper when displaying big dataframes.
+
+    Usage example (in jupyter notebook):
+        HBox([ Label('my dataframe:'), DataFrameViewer(df) ])
+    """
+    PAGE_ROWS = 20
+    PAGE_COLS = 15
+
+    def __init__(self, df: Union[pd.DataFrame, pd.Series] = None, page_rows: int = None,
+                 page_cols: int = None):
+        self.page_rows = page_rows or self.PAGE_ROWS
+        self.page_cols = page_cols or self.PAGE_COLS
+
+        self.w_filter = Text(placeholder='filter, e.g. `col a` > 3 and b == "x"',
+                             continuous_update=False, layout=Layout(width='300px'))
+        self.w_sort = Dropdown(description='sort', layout=Layout(width='200px'))
+        self.w_ascending = Dropdown(options=[('asc', True), ('desc', False)], layout=Layout(width='70px'))
+        self.w_goto = IntText(description='row', layout=Layout(width='150px'))
+        buttons = [Button(description=d, layout=Layout(width='40px')) for d in ('▲', '▼', '◀', '▶')]
+        for button, (d_row, d_col) in zip(buttons, [(-1, 0), (1, 0), (0, -1), (0, 1)]):
+            button.on_click(lambda _, d_row=d_row, d_col=d_col: self.move(d_row, d_col))
+        self.w_pos = Label()
+        self.w_table = Output()
+
+        for w in (self.w_filter, self.w_sort, self.w_ascending):
+            w.observe(self._on_view_change, 'value')
+        self.w_goto.observe(lambda change: self.goto(change['new'] - 1), 'value')
+
+        super().__init__([HBox([self.w_filter, self.w_sort, self.w_ascending]),
+                          HBox(buttons + [self.w_goto, self.w_pos]),
+                          self.w_table])
+        self.df = None
+        self.reset(df)
+
+    def reset(self, df: Union[pd.DataFrame, pd.Series] = None):
+        """Display a new dataframe, clears the filter and sorting."""
+        df = pd.DataFrame() if df is None else df.to_frame() if isinstance(df, pd.Series) else df
+        self.df = None  # skip _on_view_change while resetting the controls
+        self.w_filter.value = ''
+        self.w_sort.options = [('', None)] + [(str(col), col) for col in df.columns]
+        self.w_sort.value = None
+
+        self.df = df
+        self._rows = np.arange(len(df))
+        self._row0 = self._col0 = 0
+        self._render()
+
+    def _on_view_change(self, *_):
+        if self.df is None:  # still resetting
+            return
+        rows = np.arange(len(self.df))
+        if self.w_filter.value.strip():
+            try:
+                rows = np.flatnonzero(np.asarray(self.df.eval(self.w_filter.value), dtype=bool))
+            except Exception as e:
+                self.w_pos.value = f'filter error: {e}'
+                return
+        if self.w_sort.value is not None:
+            values = self.df[self.w_sort.value].take(rows).reset_index(drop=True)
+            order = values.sort_values(ascending=self.w_ascending.value, kind='stable').index
+            rows = rows[order.to_numpy()]
+        self._rows = rows
+        self._row0 = 0
+        self._render()
+
+    def move(self, d_row: int = 0, d_col: int = 0):
+        """Move the visible window by d_row pages of rows and d_col pages of columns."""
+        self._col0 = int(np.clip(self._col0 + d_col * self.page_cols, 0,
+                                 max(self.df.shape[1] - self.page_cols, 0)))
+        self.goto(self._row0 + d_row * self.page_rows)
+
+    def goto(self, row: int):
+        """Move the visible window to start at row (position in the filtered and sorted rows)"""
+        self._row0 = int(np.clip(row, 0, max(len(self._rows) - self.page_rows, 0)))
+        self._render()
+
+    def _render(self):
+        r0, c0 = self._row0, self._col0
+        r1 = min(r0 + self.page_rows, len(self._rows))
+        c1 = min(c0 + self.page_cols, self.df.shape[1])
+        window = self.df.iloc[self._rows[r0:r1], c0:c1]
+
+        filtered = f' (filtered from {len(self.df)})' if len(self._rows) != len(self.df) else ''
+        self.w_pos.value = (f'rows {r0 + 1}-{r1} of {len(self._rows)}{filtered}, '
+                            f'columns {c0 + 1}-{c1} of {self.df.shape[1]}')
+        self.w_table.clear_output(wait=True)
+        with self.w_table:
+            with pd.option_context('display.max_rows', self.page_rows + 1,
+                                   'display.max_columns', self.page_cols + 1):
+                display(window)
+
+
+def _frame_widget(obj: Any):
+    """DataFrameViewer for dataframes bigger than a page, OutputWrapper for anything else."""
+    if isinstance(obj, pd.DataFrame) and (len(obj) > DataFrameViewer.PAGE_ROWS or
+                                          obj.shape[1] > DataFrameViewer.PAGE_COLS):
+        return DataFrameViewer(obj)
+    return OutputWrapper(obj)
+
+# scatter traces with more points than this are rendered with WebGL (Scattergl)
+WEBGL_MIN_POINTS = 10_000
+# per-point trace properties that are sliced when a trace is downsampled
+_POINT_PROPS = ('x', 'y', 'text', 'hovertext', 'customdata', 'ids')
+
+
+def _as_float(values) -> np.ndarray:
+    values = np.asarray(values)
+    if values.dtype.kind in 'mM':
+        values = values.astype('int64')
+    return values.astype(float)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling - return the indices of n_out points
+    that preserve the visual shape of the line y(x). x must be sorted.
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets between the first and the last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[next_start:next_stop].mean(), y[next_start:next_stop].mean()
+        # twice the area of the triangle (point a, candidate point, next bucket average)
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Min-max downsampling - split y into n_out / 2 (nearly) equal buckets and return the (sorted) indices
+    of the min and max of each bucket, plus the last point.
+    """
+    n = len(y)
+    n_buckets = n_out // 2
+    if n <= n_out or n_buckets < 1:
+        return np.arange(n)
+
+    # every point is in a bucket, bucket sizes differ by at most one
+    edges = np.linspace(0, n, n_buckets + 1).astype(int)
+    bucket = np.repeat(np.arange(n_buckets), np.diff(edges))
+    idx = [[n - 1]]
+    for reduce in (np.fmin, np.fmax):
+        # first position of each bucket's min (max), buckets of only NaNs have none
+        hits = np.flatnonzero(y == reduce.reduceat(y, edges[:-1])[bucket])
+        _, first = np.unique(bucket[hits], return_index=True)
+        idx.append(hits[first])
+    return np.unique(np.concatenate(idx))
+
+
+def _downsample_trace(trace, max_points: int, method: str = 'lttb'):
+    """Return a copy of a scatter trace with at most ~max_points points (x sorted)."""
+    n = len(trace.x)
+    try:
+        x, y = _as_float(trace.x), _as_float(trace.y)
+    except (TypeError, ValueError):  # categorical axis, nothing to downsample by
+        return trace
+
+    order = np.argsort(x, kind='stable')
+    if method == 'lttb':
+        idx = order[lttb_indices(x[order], y[order], max_points)]
+    elif method == 'minmax':
+        idx = order[minmax_indices(y[order], max_points)]
+    else:
+        raise ValueError(f'Unknown downsampling method: {method}')
+
+    props = trace.to_plotly_json()
+    for key in _POINT_PROPS:
+        if key in props and np.ndim(props[key]) > 0 and len(props[key]) == n:
+            props[key] = np.asarray(props[key])[idx]
+    marker = props.get('marker', {})
+    for key in ('color', 'size', 'symbol', 'opacity'):
+        if np.ndim(marker.get(key)) > 0 and len(marker[key]) == n:
+            marker[key] = np.asarray(marker[key])[idx]
+    return type(trace)(props)
+
+
+def _prepare_trace(trace, webgl: bool = True, max_points: int = None, method: str = 'lttb'):
+    """Downsample scatter traces longer than max_points, and switch long ones to WebGL."""
+    if trace.type not in ('scatter', 'scattergl') or trace.x is None or trace.y is None:
+        return trace
+    if max_points and len(trace.x) > max_points:
+        trace = _downsample_trace(trace, max_points, method)
+    if webgl and trace.type == 'scatter' and len(trace.x) > WEBGL_MIN_POINTS:
+        trace = go.Scattergl(trace.to_plotly_json(), skip_invalid=True)
+    return trace
+
+
+def optimize_fig(fig: plotly.graph_objects.Figure, webgl: bool = True, max_points: int = None,
+                 method: str = 'lttb') -> plotly.graph_objects.Figure:
+    """
+    Return a copy of the figure where scatter traces longer than max_points are downsampled
+    and traces longer than WEBGL_MIN_POINTS are rendered with WebGL.
+    :param webgl: switch long scatter traces to Scattergl
+    :param max_points: downsample scatter traces to about this many points, None - don't downsample
+    :param method: 'lttb' (Largest-Triangle-Three-Buckets, for lines) or 'minmax' (keeps the extremes)
+    """
+    return go.Figure(data=[_prepare_trace(t, webgl, max_points, method) for t in fig.data],
+                     layout=fig.layout)
+
+
+def subplots(*figs, webgl: bool = True, max_points: int = None,
+             method: str = 'lttb') -> plotly.graph_objects.Figure:
     """
     Create a subplot figure from a list of figures with two columns.
-    Accepts plotly express and graph_objects figures.
+    Accepts plotly express and graph_objects figures. All the traces of each figure are added
+    to its subplot. See optimize_fig for webgl, max_points and method.
     :return:
     """
     ncols = 2
@@ -108,12 +453,12 @@ def subplots(*figs) -> plotly.graph_objects.Figure:
         # plots are indexed starting with 1
         row = i // 2 + 1
         col = i % 2 + 1
-        fig.add_trace(curr_fig.data[0], row=row, col=col)
+        for trace in curr_fig.data:
+            fig.add_trace(_prepare_trace(trace, webgl, max_points, method), row=row, col=col)
 
     return fig
 
 
-
 def sub_dfs(*dfs):
     """
     Stack pandas dataframes side by side with as many rows as needed based on
@@ -138,17 +483,22 @@ def sub_dfs(*dfs):
 
         for (df_l, df_r), (label_l, label_r) in zip(grouped(dfs, 2),
                                                     grouped(labels, 2)):
-            container.children += (HBox([Label(label_l), OutputWrapper(df_l),
-                                         Label(label_r), OutputWrapper(df_r)]),)
+            container.children += (HBox([Label(label_l), _frame_widget(df_l),
+                                         Label(label_r), _frame_widget(df_r)]),)
     else:
         if len(dfs) % 2 == 1:
             dfs = dfs + (None,)
         for df_l, df_r in grouped(dfs, 2):
-            container.children += (HBox([OutputWrapper(df_l), OutputWrapper(df_r)]),)
+            container.children += (HBox([_frame_widget(df_l), _frame_widget(df_r)]),)
 
     return container
 
 
+def _max_point(fig: plotly.graph_objects.Figure) -> float:
+    """Max x or y value of the first trace of a figure"""
+    return max(np.nanmax(_as_float(fig.data[0]['x'])), np.nanmax(_as_float(fig.data[0]['y'])))
+
+
 def add_diagonal(fig: plotly.graph_objects.Figure, color='black', width=2):
     """
     add diaglonal line (x = y) to a plotly figure
@@ -157,9 +507,11 @@ def add_diagonal(fig: plotly.graph_objects.Figure, color='black', width=2):
     :param width: line width
     :return:
     """
-    max_point = max(fig.data[0]['x'].max(), fig.data[0]['y'].max())
-    fig.add_trace(go.Scatter(x=np.arange(max_point), y=np.arange(max_point), mode='lines',
-               line=dict(color=color, width=width, dash='dash')))
+    max_point = _max_point(fig)
+    # draw with the same renderer as the data so the line isn't hidden below a WebGL layer
+    scatter = go.Scattergl if fig.data[0].type == 'scattergl' else go.Scatter
+    fig.add_trace(scatter(x=[0, max_point], y=[0, max_point], mode='lines',
+                          line=dict(color=color, width=width, dash='dash')))
     return fig
 
 
@@ -169,7 +521,7 @@ def square_fig(fig: plotly.graph_objects.Figure):
     :param fig:
     :return:
     """
-    max_point = max(fig.data[0]['x'].max(), fig.data[0]['y'].max())
+    max_point = _max_point(fig)
     fig.update_xaxes(range=[0, max_point])
     fig.update_yaxes(range=[0, max_point])
     return fig
@@ -178,14 +530,146 @@ def square_fig(fig: plotly.graph_objects.Figure):
 def col_intersection(colA: pd.Series, colB: pd.Series) -> set:
     """
     Return a series with the intersection of two series.
+    For counts, differences and composite keys see key_overlap.
     :param colA:
     :param colB:
     :return:
     """
-    return set(colA).intersection(set(colB))
+    return set(pd.Index(colA.unique()).intersection(pd.Index(colB.unique())))
+
+
+@dataclass
+class KeyOverlap:
+    """How the (unique) join keys of two tables overlap, see key_overlap."""
+    left_unique: int
+    right_unique: int
+    intersection: int
+    left_only: int
+    right_only: int
+    left_rows: int
+    left_rows_matched: int
+    # up to `sample` keys of each of 'intersection', 'left_only' and 'right_only'
+    samples: dict = field(default_factory=dict)
+
+    @property
+    def coverage(self) -> float:
+        """Share of left rows whose key is in right, i.e. that match in a left merge"""
+        return self.left_rows_matched / self.left_rows if self.left_rows else 0.0
+
+    def to_series(self) -> pd.Series:
+        return pd.Series({k: v for k, v in asdict(self).items() if k != 'samples'} |
+                         {'coverage': self.coverage})
+
+
+def _keys_index(data: Union[pd.DataFrame, pd.Series], cols: Optional[list]) -> pd.Index:
+    """Index of the (composite) keys of each row."""
+    if isinstance(data, pd.Series):
+        return pd.Index(data)
+    if not cols:
+        raise ValueError('key columns of DataFrames are required - pass on, or left_on and right_on')
+    if len(cols) == 1:
+        return pd.Index(data[cols[0]])
+    return pd.MultiIndex.from_frame(data[cols])
+
+
+def key_overlap(left: Union[pd.DataFrame, pd.Series], right, on=None, left_on=None, right_on=None,
+                sample: int = 0, batch_size: int = 1_000_000) -> KeyOverlap:
+    """
+    Vectorized overlap analysis of the join keys of two tables, e.g. to check the coverage
+    of a merge_left_with_indicator before running it. Uses hash based pd.Index operations.
+    :param left: Series of keys or DataFrame
+    :param right: Series or DataFrame, or for a right table too big for memory - an iterable of
+                  chunks or a path to a parquet file/folder (only the right-only keys are kept in memory)
+    :param on: key column(s) of both DataFrames, several columns form a composite key.
+               Defaults to the common columns when left and right are both DataFrames (like merge)
+    :param left_on: key column(s) of left
+    :param right_on: key column(s) of right
+    :param sample: number of example keys to return for each of intersection, left_only and right_only
+    :param batch_size: rows per chunk when reading a parquet path
+    """
+    left_on = None if left_on is None and on is None else _as_list(left_on if left_on is not None else on)
+    right_on = None if right_on is None and on is None else _as_list(right_on if right_on is not None else on)
+    if left_on is None and right_on is None and isinstance(left, pd.DataFrame) \
+            and isinstance(right, pd.DataFrame):
+        left_on = right_on = [col for col in left.columns if col in right.columns]
+
+    left_keys = _keys_index(left, left_on)
+    left_unique = left_keys.unique()
+
+    if isinstance(right, (pd.DataFrame, pd.Series)):
+        right_unique = _keys_index(right, right_on).unique()
+        matched = left_unique.isin(right_unique)
+        right_only = right_unique[~right_unique.isin(left_unique)]
+        n_right_unique = len(right_unique)
+    else:
+        if isinstance(right, (str, os.PathLike)):
+            from my_utils.readers import iter_parquet_chunks
+            right = iter_parquet_chunks(right, batch_size, columns=right_on)
+        matched = np.zeros(len(left_unique), dtype=bool)
+        right_only = left_unique[:0]
+        for chunk in right:
+            chunk_unique = _keys_index(chunk, right_on).unique()
+            matched |= left_unique.isin(chunk_unique)
+            right_only = right_only.append(chunk_unique[~chunk_unique.isin(left_unique)]).unique()
+        n_right_unique = int(matched.sum()) + len(right_only)
+
+    intersection = left_unique[matched]
+    samples = {}
+    if sample:
+        samples = {'intersection': intersection[:sample].tolist(),
+                   'left_only': left_unique[~matched][:sample].tolist(),
+                   'right_only': right_only[:sample].tolist()}
+    return KeyOverlap(left_unique=len(left_unique), right_unique=n_right_unique,
+                      intersection=len(intersection), left_only=len(left_unique) - len(intersection),
+                      right_only=len(right_only), left_rows=len(left_keys),
+                      left_rows_matched=int(left_keys.isin(intersection).sum()), samples=samples)
+
+
+# order of the stats rows in describe_fast
+_FAST_DESCRIBE_STATS = ['count', 'nulls', 'memory', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def _column_stats(col: pd.Series, sample_pos: Optional[np.ndarray]) -> dict:
+    """
+    count, nulls and memory of a column, plus describe stats for numeric columns.
+    mean, std and quantiles are computed on the sample rows (all rows if sample_pos is None).
+    """
+    count = int(col.count())
+    stats = {'count': count, 'nulls': len(col) - count, 'memory': col.memory_usage(index=False)}
+    if pd.api.types.is_numeric_dtype(col.dtype) and not pd.api.types.is_bool_dtype(col.dtype):
+        sample = col if sample_pos is None else col.take(sample_pos)
+        quantiles = sample.quantile([.25, .5, .75]).to_numpy()
+        stats.update({'mean': sample.mean(), 'std': sample.std(), 'min': col.min(), 'max': col.max(),
+                      '25%': quantiles[0], '50%': quantiles[1], '75%': quantiles[2]})
+    return stats
+
+
+def describe_fast(df: pd.DataFrame, sample_size: int = 100_000, n_jobs: int = None,
+                  random_state: int = 0) -> pd.DataFrame:
+    """
+    Fast alternative to df.describe() for huge dataframes.
+    Columns are processed in parallel threads. count, nulls, memory (bytes, not deep), min and max
+    are exact, mean, std and quantiles are computed on a random sample of sample_size rows
+    when the dataframe is longer than that.
+    :param df:
+    :param sample_size: number of rows to sample for the approximate stats
+    :param n_jobs: number of threads, defaults to ThreadPoolExecutor's default
+    :param random_state: seed of the sample
+    :return: DataFrame with a column per df column and a row per stat
+    """
+    sample_pos = None
+    if len(df) > sample_size:
+        rng = np.random.default_rng(random_state)
+        sample_pos = np.sort(rng.choice(len(df), sample_size, replace=False))
 
+    with ThreadPoolExecutor(n_jobs) as pool:
+        stats = list(pool.map(lambda i: _column_stats(df.iloc[:, i], sample_pos), range(df.shape[1])))
 
-def df_sneak_peak(df: pd.DataFrame, n_rows: int = 10) -> None:
+    return pd.DataFrame(stats, index=df.columns).reindex(columns=_FAST_DESCRIBE_STATS).T
+
+
+def df_sneak_peak(df: pd.DataFrame, n_rows: int = 10, fast: Optional[bool] = None,
+                  sample_size: int = 100_000) -> None:
     """
     Display a sneak peak of a dataframe -
     1. first n (def=10) rows
@@ -194,12 +678,25 @@ def df_sneak_peak(df: pd.DataFrame, n_rows: int = 10) -> None:
     4. Column dtypes
     :param df:
     :param n_rows: Number of rows from the top to display
+    :param fast: use describe_fast instead of df.describe(),
+                 by default used when the dataframe is longer than sample_size
+    :param sample_size: sample size for describe_fast
     :return:
     """
+    if fast is None:
+        fast = len(df) > sample_size
+    if not fast:
+        describe, describe_label = df.describe(), 'Describe (exact):'
+    elif len(df) > sample_size:
+        describe = describe_fast(df, sample_size)
+        describe_label = f'Describe (approximate - mean, std and quantiles of {sample_size:,} sampled rows):'
+    else:
+        describe, describe_label = describe_fast(df, sample_size), 'Describe (exact):'
+
     h = HBox([VBox([Label('Head:'),
-                    OutputWrapper(df.head(n_rows)),
-                    Label('Describe:'),
-                    OutputWrapper(df.describe())],
+                    _frame_widget(df.head(n_rows)),
+                    Label(describe_label),
+                    _frame_widget(describe)],
                    layout=Layout(overflow='scroll hidden', max_width='65%')),
               VBox([Label('Dtypes:'),
                     OutputWrapper(df.dtypes),
@@ -210,6 +707,7 @@ def df_sneak_peak(df: pd.DataFrame, n_rows: int = 10) -> None:
     display(h)
 
 
+@instrument
 def load_file_to_dict(file_path: str) -> dict:
     """
     Loads a JSON or YAML file (local or S3) into a dictionary.
@@ -220,17 +718,19 @@ def load_file_to_dict(file_path: str) -> dict:
     Returns:
         dict: The loaded dictionary.
     """
-    import boto3
     if file_path.startswith("s3://"):
+        import boto3
         # Load from S3
-        s3 = boto3.client("s3")
+        s3 = watch_s3(boto3.client("s3"))
         bucket_name, key = file_path[5:].split("/", 1)
         obj = s3.get_object(Bucket=bucket_name, Key=key)
         file_content = obj["Body"].read().decode("utf-8")
+        count(bytes_read=obj["ContentLength"])
     else:
         # Load from local file system
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
+        count_file(file_path)
         with open(file_path, "r", encoding="utf-8") as f:
             file_content = f.read()
 
@@ -244,64 +744,154 @@ def load_file_to_dict(file_path: str) -> dict:
             raise ValueError("File is not valid JSON or YAML.")
 
 
-def pretty_print_dict_with_filter(
-    input_data: Union[dict, str], key_filter: str = None
-):
+class FlatDictIndex:
     """
-    Pretty prints a dictionary in a Jupyter Lab notebook. If a key_filter is provided,
-    filters the dictionary to show only keys that contain the key_filter substring,
-    and prints them line by line with colors.
+    Flattened index of a nested dictionary - one entry per key with its full dotted path and value.
+    Built once (iteratively, so deep documents don't hit the recursion limit) and searched many times.
 
-    Args:
-        dictionary (dict): The dictionary to pretty print.
-        key_filter (str): Substring to filter keys. If None, prints the entire dictionary.
+    Usage example:
+        index = FlatDictIndex(config)
+        [index.paths[i] for i in index.search('lr', mode='prefix')]
+    """
+    MODES = ('substring', 'prefix', 'regex')
+
+    def __init__(self, d: dict):
+        self.doc = d
+        self.paths, self.keys, self.values = [], [], []
+        self._value_strs = None
+
+        # depth first, keys are indexed in the same order as a recursive walk
+        stack = [("", iter(d.items()))]
+        while stack:
+            path, items = stack[-1]
+            for key, value in items:
+                current_path = f"{path}.{key}" if path else str(key)
+                self.paths.append(current_path)
+                self.keys.append(str(key))
+                self.values.append(value)
+                if isinstance(value, dict):
+                    stack.append((current_path, iter(value.items())))
+                    break
+            else:  # finished this dict
+                stack.pop()
+
+    def __len__(self):
+        return len(self.paths)
+
+    @property
+    def value_strs(self) -> list:
+        """String representation of the leaf values (empty for dict values), built on first use."""
+        if self._value_strs is None:
+            self._value_strs = ['' if isinstance(v, dict) else str(v) for v in self.values]
+        return self._value_strs
+
+    def search(self, pattern: Optional[str], mode: str = 'substring', search_values: bool = False) -> list:
+        """
+        Return the positions of the entries whose key (or value, if search_values) matches pattern.
+
+        Args:
+            pattern (str): Pattern to search for. If None, all entries match.
+            mode (str): 'substring', 'prefix' or 'regex' (re.search).
+            search_values (bool): Also match the leaf values.
+        """
+        if pattern is None:
+            return list(range(len(self)))
+        if mode == 'substring':
+            match = lambda s: pattern in s
+        elif mode == 'prefix':
+            match = lambda s: s.startswith(pattern)
+        elif mode == 'regex':
+            match = re.compile(pattern).search
+        else:
+            raise ValueError(f"Unknown search mode: {mode}, expected one of {self.MODES}")
+
+        if not search_values:
+            return [i for i, key in enumerate(self.keys) if match(key)]
+        return [i for i, (key, value) in enumerate(zip(self.keys, self.value_strs))
+                if match(key) or match(value)]
+
+
+# Indexes of the last documents passed to get_dict_index
+_INDEX_CACHE = OrderedDict()
+_INDEX_CACHE_SIZE = 8
+
+
+def get_dict_index(input_data: Union[dict, str], refresh: bool = False) -> FlatDictIndex:
+    """
+    Return a (cached) FlatDictIndex of a dictionary or of a JSON/YAML file (local or S3).
+    Local files are re-indexed when modified, S3 files and dicts modified in place need refresh=True.
     """
-    # Load the dictionary if input_data is a string
     if isinstance(input_data, str):
-        input_data = load_file_to_dict(input_data)
+        mtime = None if input_data.startswith("s3://") else os.path.getmtime(input_data)
+        cache_key = ('path', input_data, mtime)
+    else:
+        cache_key = ('dict', id(input_data))
+
+    index = _INDEX_CACHE.get(cache_key)
+    # dict ids can be reused after the dict is garbage collected
+    if index is not None and not refresh and (isinstance(input_data, str) or index.doc is input_data):
+        _INDEX_CACHE.move_to_end(cache_key)
+        return index
 
-    if not isinstance(input_data, dict):
+    doc = load_file_to_dict(input_data) if isinstance(input_data, str) else input_data
+    if not isinstance(doc, dict):
         raise ValueError("The input must be a dictionary or a valid file path to a JSON/YAML file.")
 
+    _INDEX_CACHE[cache_key] = index = FlatDictIndex(doc)
+    while len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+        _INDEX_CACHE.popitem(last=False)
+    return index
 
-    def search_keys(d: dict, path: str = "") -> list:
-        """
-        Recursively searches for keys containing the filter substring in the dictionary.
 
-        Args:
-            d (dict): Dictionary to search in.
-            path (str): Current path of keys being traversed.
+# max number of characters displayed when pretty printing a whole dictionary
+MAX_PRETTY_PRINT_CHARS = 200_000
 
-        Returns:
-            list: A list of tuples with (full_key_path, value) for matching keys.
-        """
-        results = []
-        for key, value in d.items():
-            current_path = f"{path}.{key}" if path else key
-            if key_filter is None or key_filter in key:
-                results.append((current_path, value))
-            if isinstance(value, dict):
-                results.extend(search_keys(value, current_path))
-        return results
-
-    # Perform the search
-    matches = search_keys(input_data)
+
+def pretty_print_dict_with_filter(
+    input_data: Union[dict, str], key_filter: str = None, mode: str = 'substring',
+    search_values: bool = False, limit: int = 200, page: int = 0, refresh: bool = False
+):
+    """
+    Pretty prints a dictionary in a Jupyter Lab notebook. If a key_filter is provided,
+    filters the dictionary to show only keys that match the key_filter,
+    and prints them line by line with colors.
+    The flattened dictionary is indexed once and cached (see get_dict_index),
+    so filtering the same document again doesn't walk it again.
+
+    Args:
+        dictionary (dict): The dictionary to pretty print.
+        key_filter (str): Pattern to filter keys. If None, prints the entire dictionary.
+        mode (str): How key_filter is matched - 'substring', 'prefix' or 'regex'.
+        search_values (bool): Also show keys whose (leaf) value matches key_filter.
+        limit (int): Max number of matches to show.
+        page (int): Which page of limit matches to show.
+        refresh (bool): Rebuild the index of the dictionary.
+    """
+    index = get_dict_index(input_data, refresh)
 
     # Format the results for display
     if key_filter:
+        matches = index.search(key_filter, mode, search_values)
         if not matches:
             display(HTML("<b>No matching keys found.</b>"))
             return
 
-        html_lines = []
-        for path, value in matches:
+        start = page * limit
+        html_lines = [f"<b>Showing matches {start + 1}-{min(start + limit, len(matches))} "
+                      f"of {len(matches)}</b>"]
+        for i in matches[start:start + limit]:
             # Highlight the path in blue and the key-value in green
             html_lines.append(
-                    f"<span style='color:lightblue;'>{path}</span> -> <span style='color:#d4f1d4;'>{value}</span>"
+                    f"<span style='color:lightblue;'>{html.escape(index.paths[i])}</span> -> "
+                    f"<span style='color:#d4f1d4;'>{html.escape(str(index.values[i]))}</span>"
             )
         # Join the lines for final display
         display(HTML("<br>".join(html_lines)))
     else:
         # Default pretty printing without filtering
-        pretty_json = dumps(input_data, indent=4, ensure_ascii=False)
+        pretty_json = dumps(index.doc, indent=4, ensure_ascii=False, default=str)
+        if len(pretty_json) > MAX_PRETTY_PRINT_CHARS:
+            pretty_json = (pretty_json[:MAX_PRETTY_PRINT_CHARS] +
+                           f"\n... truncated {len(pretty_json) - MAX_PRETTY_PRINT_CHARS:,} characters, "
+                           f"use key_filter to search the document")
         display(Markdown(f"```json\n{pretty_json}\n```"))
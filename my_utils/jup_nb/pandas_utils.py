@@ -1,26 +1,384 @@
+import os
+from collections.abc import Hashable
+from typing import Optional, Tuple
+
+import numpy as np
 import pandas as pd
 
-def vc(self, *args, **kwargs):
-    return self.value_counts(*args, **kwargs)
+# rows per chunk when approximating the value counts of an in-memory Series/DataFrame
+APPROX_CHUNK_ROWS = 1_000_000
+
+
+def vc(self, *args, top: int = None, approx: bool = False, **kwargs):
+    """
+    value_counts alias.
+    :param top: return only the top most common values (rows of the subset columns for a DataFrame).
+                Counted with a factorized groupby and a partial sort instead of a full value_counts.
+    :param approx: approximate the top counts in bounded memory, see value_counts_approx
+    """
+    if top is None:
+        return self.value_counts(*args, **kwargs)
+    if args:
+        raise TypeError('vc with top only accepts keyword arguments')
+    if approx:
+        return value_counts_approx(self, top, subset=kwargs.get('subset'),
+                                   normalize=kwargs.get('normalize', False))
+    return _value_counts_top(self, top, **kwargs)
 
 def vcn(self, *args, **kwargs):
-    return self.value_counts(normalize=True, *args, **kwargs)
+    return vc(self, normalize=True, *args, **kwargs)
+
+
+def _top_k(counts: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k largest non-zero counts, sorted by count descending and ties by position
+    (first appearance for factorized codes, like value_counts).
+    """
+    k = min(k, np.count_nonzero(counts))
+    if k == 0:
+        return np.arange(0)
+    # all the counts above the k-th largest, and the first of the counts tied with it
+    kth = np.partition(counts, len(counts) - k)[len(counts) - k]
+    above = np.flatnonzero(counts > kth)
+    top = np.sort(np.concatenate([above, np.flatnonzero(counts == kth)[:k - len(above)]]))
+    return top[np.argsort(-counts[top], kind='stable')]
+
+
+def _factorize_rows(df: pd.DataFrame, dropna: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Factorized groupby of the rows of df - dense group codes (in order of first appearance)
+    and a mask of the rows without NA (all True if not dropna).
+    """
+    group = np.zeros(len(df), dtype=np.int64)
+    valid = np.ones(len(df), dtype=bool)
+    for i in range(df.shape[1]):
+        codes, uniques = pd.factorize(df.iloc[:, i], use_na_sentinel=dropna)
+        valid &= codes >= 0
+        # both factors are at most len(df) + 1 so this can't overflow int64 for realistic lengths
+        group, _ = pd.factorize(group * (len(uniques) + 1) + codes + 1)
+    return group, valid
+
+
+def _value_counts_top(self, top: int, subset=None, normalize=False, dropna=True) -> pd.Series:
+    """The top rows of value_counts, without counting and sorting all the values."""
+    if isinstance(self, pd.Series):
+        codes, uniques = pd.factorize(self, use_na_sentinel=dropna)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        positions = _top_k(counts, top)
+        index = pd.Index(uniques).take(positions).rename(self.name)
+    else:
+        cols = self.columns if subset is None else _as_list(subset)
+        group, valid = _factorize_rows(self[cols], dropna)
+        counts = np.bincount(group[valid], minlength=group.max() + 1 if len(group) else 0)
+        positions = _top_k(counts, top)
+        # first row of each top group
+        rows = np.flatnonzero(np.isin(group, positions) & valid)
+        codes, first = np.unique(group[rows], return_index=True)
+        first_row = dict(zip(codes, rows[first]))
+        index = pd.MultiIndex.from_frame(self[cols].take([first_row[p] for p in positions]))
+
+    values = counts[positions]
+    if normalize:
+        return pd.Series(values / max(counts.sum(), 1), index=index, name='proportion')
+    return pd.Series(values, index=index, name='count')
+
+
+def value_counts_approx(data, top: int = 20, capacity: int = None, subset=None, normalize=False,
+                        batch_size: int = APPROX_CHUNK_ROWS) -> pd.Series:
+    """
+    Approximate top value counts in bounded memory, in one pass over chunks of data.
+    Each chunk is counted exactly and merged into a Misra-Gries summary of at most capacity values.
+    Counts are lower bounds, under-counted by at most (number of rows) / (capacity + 1) - so with the
+    default capacity (100 * top) every value with more than 1% of the rows is reported.
+    :param data: Series or DataFrame, an iterable of Series/DataFrame chunks
+                 (e.g. load_asset_chunks(name, group)), or a path to a parquet file or partitioned folder
+    :param top: number of values to return
+    :param capacity: max number of values kept in the summary
+    :param subset: columns to count the rows of (DataFrames only, like value_counts)
+    :param normalize: return proportions of the number of (non-NA) rows
+    :param batch_size: rows per chunk for in-memory and parquet data
+    """
+    chunks = data
+    if isinstance(data, (str, os.PathLike)):
+        from my_utils.readers import iter_parquet_chunks
+        chunks = iter_parquet_chunks(data, batch_size, columns=None if subset is None else _as_list(subset))
+    elif isinstance(data, (pd.Series, pd.DataFrame)):
+        chunks = (data.iloc[i:i + batch_size] for i in range(0, len(data), batch_size))
+    capacity = capacity or 100 * top
+
+    summary, total = None, 0
+    for chunk in chunks:
+        counts = chunk.value_counts(subset=subset) if isinstance(chunk, pd.DataFrame) else chunk.value_counts()
+        total += counts.sum()
+        summary = counts if summary is None else summary.add(counts, fill_value=0)
+        if len(summary) > capacity:
+            summary = summary.nlargest(capacity + 1)
+            summary = summary.iloc[:capacity] - summary.iloc[capacity]
+            summary = summary[summary > 0]
+    if summary is None:
+        raise ValueError('data is empty')
+
+    summary = summary.nlargest(top).astype(np.int64)
+    if normalize:
+        return (summary / max(total, 1)).rename('proportion')
+    return summary.rename('count')
 
 def flatten_column_multi_index(self, sep: str = "_") -> pd.DataFrame:
     self.columns = [sep.join(col).strip(sep) for col in self.columns.values]
 
-def merge_left_with_indicator(self, right, drop_ind_col=True, *args, **kwargs):
-    merged = self.merge(right, how='left', indicator=True, *args, **kwargs)
+def _as_list(x) -> list:
+    return list(x) if isinstance(x, (list, tuple)) else [x]
+
+
+def _merge_keys(left: pd.DataFrame, right: pd.DataFrame, kwargs: dict) -> Optional[Tuple[list, list]]:
+    """Left and right key columns of a merge, None if it isn't a merge on column labels."""
+    if kwargs.get('left_index') or kwargs.get('right_index'):
+        return None
+    on = kwargs.get('on')
+    if on is not None:
+        left_on = right_on = _as_list(on)
+    elif kwargs.get('left_on') is not None and kwargs.get('right_on') is not None:
+        left_on, right_on = _as_list(kwargs['left_on']), _as_list(kwargs['right_on'])
+    else:  # pandas default - merge on the common columns
+        left_on = right_on = [col for col in left.columns if col in right.columns]
+
+    # keys can also be arrays
+    if not left_on or any(not isinstance(k, Hashable) or k not in left.columns for k in left_on) \
+            or any(not isinstance(k, Hashable) or k not in right.columns for k in right_on):
+        return None
+    return left_on, right_on
+
+
+def _left_only_count(left: pd.DataFrame, right: pd.DataFrame, left_on: list, right_on: list) -> int:
+    """Number of left rows whose key is not in right"""
+    if len(left_on) == 1:
+        matched = left[left_on[0]].isin(right[right_on[0]])
+    else:
+        matched = pd.MultiIndex.from_frame(left[left_on]).isin(pd.MultiIndex.from_frame(right[right_on]))
+    return int(len(left) - np.count_nonzero(matched))
+
+
+def _print_merge_stats(n_rows: int, n_left_only: int):
+    """Print the same counts as merged['_merge'].value_counts()"""
+    print(pd.Series({'both': n_rows - n_left_only, 'left_only': n_left_only, 'right_only': 0},
+                    name='count').rename_axis('_merge'))
+
+
+def _encode_keys(left: pd.DataFrame, right: pd.DataFrame, left_on: list, right_on: list):
+    """
+    Convert non-numeric key columns of both sides to categoricals with the same categories,
+    so the merge hashes integer codes instead of strings.
+    :return: left, right (shallow copies) and {column: original dtype}
+    """
+    left, right = left.copy(deep=False), right.copy(deep=False)
+    dtypes = {}
+    for l_col, r_col in zip(left_on, right_on):
+        if pd.api.types.is_numeric_dtype(left[l_col]) or isinstance(left[l_col].dtype, pd.CategoricalDtype):
+            continue
+        categories = pd.concat([left[l_col], right[r_col]], ignore_index=True).dropna().unique()
+        dtype = pd.CategoricalDtype(categories)
+        dtypes.update({l_col: left[l_col].dtype, r_col: right[r_col].dtype})
+        left[l_col] = left[l_col].astype(dtype)
+        right[r_col] = right[r_col].astype(dtype)
+    return left, right, dtypes
+
+
+# merge arguments merge_left_chunked supports
+_CHUNKED_MERGE_KWARGS = ('on', 'left_on', 'right_on', 'suffixes', 'batch_size')
+
+
+def merge_left_with_indicator(self, right, drop_ind_col=True, *args, encode_keys=False, **kwargs):
+    """
+    Left merge and print how many rows matched (the value counts of the merge indicator).
+    When merging on columns the counts are computed from the keys, without an indicator column.
+    :param right: DataFrame, or a right table too big for memory - an iterable of DataFrame chunks
+                  or a path to a parquet file/folder (see merge_left_chunked, only its arguments are supported)
+    :param drop_ind_col: if False, the result keeps the '_merge' indicator column and nothing is printed
+    :param encode_keys: merge non-numeric keys as shared categoricals, faster for string keys
+    """
+    if not isinstance(right, (pd.DataFrame, pd.Series)):
+        unsupported = sorted(set(kwargs) - set(_CHUNKED_MERGE_KWARGS)) + (['encode_keys'] if encode_keys else [])
+        if args or unsupported:
+            got = f'positional arguments {args!r}' if args else ', '.join(unsupported)
+            raise ValueError(f'a chunked merge only supports the keyword arguments '
+                             f'{", ".join(_CHUNKED_MERGE_KWARGS)}, got {got}')
+        return merge_left_chunked(self, right, drop_ind_col, **kwargs)
+
+    keys = None if args or isinstance(right, pd.Series) else _merge_keys(self, right, kwargs)
+    if keys is None:
+        merged = self.merge(right, how='left', indicator=True, *args, **kwargs)
+        if drop_ind_col:
+            print(merged['_merge'].value_counts())
+            return merged.drop(columns='_merge')
+        return merged
+
+    left_enc, right_enc, dtypes = _encode_keys(self, right, *keys) if encode_keys else (self, right, {})
+    merged = left_enc.merge(right_enc, how='left', indicator=not drop_ind_col, **kwargs)
+    for col, dtype in dtypes.items():
+        if col in merged.columns:
+            merged[col] = merged[col].astype(dtype)
+
     if drop_ind_col:
-        print(merged['_merge'].value_counts())
-        return merged.drop(columns='_merge')
+        _print_merge_stats(len(merged), _left_only_count(self, right, *keys))
     return merged
 
-def df_min_max(self, col):
-    return self[col].min(), self[col].max()
+
+def merge_left_chunked(self, right_chunks, drop_ind_col=True, on=None, left_on=None, right_on=None,
+                       suffixes=('_x', '_y'), batch_size=1_000_000):
+    """
+    Left merge with a right table that is too big for memory, and print how many rows matched.
+    Each chunk is merged with the left key columns only, the result is assembled once at the end
+    in the same row order as a pandas left merge.
+    :param right_chunks: iterable of DataFrames, or a path to a parquet file or partitioned folder.
+                         For a parquet asset use load_asset_chunks(name, group)
+    :param drop_ind_col: if False, the result has a '_merge' indicator column and nothing is printed
+    :param batch_size: rows per chunk when reading a parquet path
+    """
+    if isinstance(right_chunks, (str, os.PathLike)):
+        from my_utils.readers import iter_parquet_chunks
+        right_chunks = iter_parquet_chunks(right_chunks, batch_size)
+    if on is not None:
+        left_on = right_on = on
+    if left_on is None or right_on is None:
+        raise ValueError('on or left_on and right_on are required for a chunked merge')
+    left_on, right_on = _as_list(left_on), _as_list(right_on)
+
+    # merge on temporary names so the left keys never collide with the right columns
+    tmp_keys = [f'__key{i}' for i in range(len(left_on))]
+    keys = self[left_on].set_axis(tmp_keys, axis=1).reset_index(drop=True)
+    keys['__pos'] = np.arange(len(self))
+
+    pieces, right_cols = [], None
+    matched = np.zeros(len(self), dtype=bool)
+    for chunk in right_chunks:
+        if right_cols is None:
+            # like pandas, a key with the same name on both sides appears once
+            same_name_keys = {r for l, r in zip(left_on, right_on) if l == r}
+            right_cols = [col for col in chunk.columns if col not in same_name_keys]
+        piece = keys.merge(chunk, how='inner', left_on=tmp_keys, right_on=right_on)[['__pos'] + right_cols]
+        matched[piece['__pos'].to_numpy()] = True
+        pieces.append(piece)
+    if right_cols is None:
+        raise ValueError('right_chunks is empty')
+
+    unmatched = pd.DataFrame({'__pos': np.flatnonzero(~matched)})
+    # appending an empty unmatched frame would still upcast int right columns to float
+    right_part = pd.concat(pieces + ([unmatched] if len(unmatched) else []),
+                           ignore_index=True).sort_values('__pos', kind='stable')
+    pos = right_part.pop('__pos').to_numpy()
+
+    collisions = [col for col in right_cols if col in self.columns]
+    left_part = self.take(pos).rename(columns={col: f'{col}{suffixes[0]}' for col in collisions})
+    right_part = right_part.rename(columns={col: f'{col}{suffixes[1]}' for col in collisions})
+    merged = pd.concat([left_part.reset_index(drop=True), right_part.reset_index(drop=True)], axis=1)
+
+    if drop_ind_col:
+        _print_merge_stats(len(merged), len(unmatched))
+    else:
+        merged['_merge'] = pd.Categorical(np.where(matched[pos], 'both', 'left_only'),
+                                          categories=['left_only', 'right_only', 'both'])
+    return merged
+
+# block size of the single pass min/max, small enough for both reductions to run on cached data
+_MIN_MAX_BLOCK = 1 << 16
+
+
+def _min_max(s: pd.Series) -> tuple:
+    """min and max of a Series in one pass over the memory (NaN skipping, like pandas)."""
+    if not isinstance(s.dtype, np.dtype) or s.dtype.kind not in 'biuf' or len(s) == 0:
+        return s.min(), s.max()
+    values = s.to_numpy()
+    lo, hi = np.fmin.reduce(values[:_MIN_MAX_BLOCK]), np.fmax.reduce(values[:_MIN_MAX_BLOCK])
+    for start in range(_MIN_MAX_BLOCK, len(values), _MIN_MAX_BLOCK):
+        block = values[start:start + _MIN_MAX_BLOCK]
+        lo, hi = np.fmin(lo, np.fmin.reduce(block)), np.fmax(hi, np.fmax.reduce(block))
+    return lo, hi
+
+
+def df_min_max(self, *cols):
+    """
+    min and max of columns, both bounds computed in a single pass over each column.
+    For parquet files and assets see readers.parquet_min_max and asset_min_max.
+    :return: (min, max) for a single column, otherwise a DataFrame with min and max rows
+             and a column per col (all columns if none are given)
+    """
+    if len(cols) == 1 and not isinstance(cols[0], list):
+        return _min_max(self[cols[0]])
+    cols = cols[0] if len(cols) == 1 else list(cols) or list(self.columns)
+    return pd.DataFrame({col: _min_max(self[col]) for col in cols}, index=['min', 'max'])
 
 def series_min_max(self):
-    return self.min(), self.max()
+    return _min_max(self)
+
+_INT_DTYPES = [np.int8, np.int16, np.int32]
+_UINT_DTYPES = [np.uint8, np.uint16, np.uint32]
+
+
+def _shrink_series(s: pd.Series, max_cat_ratio: float = 0.5, arrow_strings: bool = False) -> pd.Series:
+    """
+    Smallest safe dtype for s - downcast integers to fit their range, floats to float32 only when
+    no value changes, and strings to categoricals (if unique / len <= max_cat_ratio) or arrow strings.
+    """
+    kind = s.dtype.kind if isinstance(s.dtype, np.dtype) else None
+    if len(s) == 0:
+        return s
+    if kind in ('i', 'u'):
+        lo, hi = _min_max(s)
+        # signed stay signed - unsigned results would wrap around on subtraction
+        for dtype in _UINT_DTYPES if kind == 'u' else _INT_DTYPES:
+            if np.iinfo(dtype).min <= lo and hi <= np.iinfo(dtype).max:
+                return s.astype(dtype) if np.dtype(dtype).itemsize < s.dtype.itemsize else s
+    elif kind == 'f' and s.dtype.itemsize > 4:
+        s32 = s.astype(np.float32)
+        if np.array_equal(s32.to_numpy(dtype=s.dtype), s.to_numpy(), equal_nan=True):
+            return s32
+    elif kind == 'O' or isinstance(s.dtype, pd.StringDtype):
+        # object columns of lists, dicts or mixed types are left as is (and may not be hashable)
+        if kind == 'O' and pd.api.types.infer_dtype(s, skipna=True) != 'string':
+            return s
+        if s.nunique(dropna=False) <= max_cat_ratio * len(s):
+            return s.astype('category')
+        if arrow_strings and kind == 'O':
+            return s.astype('string[pyarrow]')
+    return s
+
+
+def shrink(self, max_cat_ratio: float = 0.5, arrow_strings: bool = False, inplace: bool = False,
+           verbose: bool = True) -> pd.DataFrame:
+    """
+    Reduce the memory of a DataFrame column by column - downcast numeric columns safely,
+    convert low cardinality string columns to categoricals and optionally others to arrow strings.
+    A column is only replaced if it got smaller. The per-column report is kept in
+    df.attrs['shrink_report'] (JSON friendly records, see pd.DataFrame(df.attrs['shrink_report'])).
+    :param max_cat_ratio: convert string columns with (unique values / rows) <= max_cat_ratio to categoricals
+    :param arrow_strings: convert the other object string columns to string[pyarrow]
+    :param inplace: replace the columns of self, so each original column can be freed as soon as it's converted
+    :param verbose: print the memory of each column before and after
+    """
+    df = self if inplace else self.copy(deep=False)
+    report = []
+    for col in df.columns:
+        before = df[col]
+        after = _shrink_series(before, max_cat_ratio, arrow_strings)
+        bytes_before = before.memory_usage(index=False, deep=True)
+        bytes_after = after.memory_usage(index=False, deep=True)
+        if after is not before and bytes_after < bytes_before:
+            df[col] = after
+        else:
+            after, bytes_after = before, bytes_before
+        report.append({'column': str(col), 'dtype_before': str(before.dtype), 'dtype_after': str(after.dtype),
+                       'bytes_before': int(bytes_before), 'bytes_after': int(bytes_after)})
+
+    # records rather than a DataFrame - attrs are compared by concat and saved as JSON by to_parquet
+    df.attrs['shrink_report'] = report
+    if verbose:
+        report = pd.DataFrame(report).set_index('column')
+        total_before, total_after = report['bytes_before'].sum(), report['bytes_after'].sum()
+        print(report)
+        print(f'{total_before / 2 ** 20:,.1f} MB -> {total_after / 2 ** 20:,.1f} MB '
+              f'({1 - total_after / max(total_before, 1):.0%} saved)')
+    return df
+
 
 pd.Series.vc = vc
 pd.Series.vcn = vcn
@@ -28,7 +386,9 @@ pd.Series.merge_left_with_indicator = merge_left_with_indicator
 pd.Series.min_max = series_min_max
 
 pd.DataFrame.merge_left_with_indicator = merge_left_with_indicator
+pd.DataFrame.merge_left_chunked = merge_left_chunked
 pd.DataFrame.flatten_column_multi_index = flatten_column_multi_index
 pd.DataFrame.min_max = df_min_max
 pd.DataFrame.vc = vc
 pd.DataFrame.vcn = vcn
+pd.DataFrame.shrink = shrink
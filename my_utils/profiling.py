@@ -0,0 +1,268 @@
+"""
+Opt-in instrumentation of the my_utils hot paths (asset manager metadata and I/O, readers, S3 helpers,
+DictViewer rendering) - call counts, wall time, bytes read / written and S3 requests per function.
+Disabled by default, while disabled an instrumented function costs one extra function call.
+
+Usage example:
+    from my_utils import profiling
+    profiling.enable()
+    df = load_asset('features', 'train')
+    print(profiling.report())
+
+In a notebook (after %load_ext main_ext):
+    %my_utils_profile on     # print a breakdown after every cell
+    %my_utils_profile show   # totals since enabled / reset
+"""
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+COUNTERS = ('calls', 'seconds', 'bytes_read', 'bytes_written', 's3_requests')
+# counters recorded while no instrumented function is running
+OUTSIDE = '<outside instrumented calls>'
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()  # .stack - names of the instrumented functions running in this thread
+_totals: Dict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+_exporters: List[Callable] = []
+_cell_start: Dict[str, Dict[str, float]] = {}
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Forget all the recorded stats."""
+    with _lock:
+        _totals.clear()
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    """Copy of the recorded stats - {function name: {counter: value}}."""
+    with _lock:
+        return {name: dict(counters) for name, counters in _totals.items()}
+
+
+def _stack() -> list:
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def _record(name: str, **counters):
+    with _lock:
+        entry = _totals[name]
+        for counter, value in counters.items():
+            entry[counter] += value
+
+
+def count(**counters):
+    """
+    Add to counters (bytes_read=..., s3_requests=...) of the innermost running instrumented function.
+    No-op while disabled.
+    """
+    if not _enabled:
+        return
+    stack = _stack()
+    _record(stack[-1] if stack else OUTSIDE, **counters)
+
+
+def count_file(path, counter: str = 'bytes_read'):
+    """count() the size of a file, or of all the files in a folder (partitioned parquet)."""
+    if not _enabled:
+        return
+    path = str(path)
+    if os.path.isfile(path):
+        size = os.path.getsize(path)
+    elif os.path.isdir(path):
+        size = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+    else:
+        return
+    count(**{counter: size})
+
+
+def _on_s3_request(**_):
+    count(s3_requests=1)
+
+
+def watch_s3(client):
+    """Count the requests sent by a boto3 client (paginated calls count once per page). Returns client."""
+    if _enabled:
+        client.meta.events.register('before-send.s3', _on_s3_request)
+    return client
+
+
+def _name(func: Callable) -> str:
+    return f'{func.__module__.removeprefix("my_utils.")}.{func.__qualname__}'
+
+
+def instrument(func: Callable = None, *, name: str = None):
+    """
+    Decorator - record calls and wall time of func (and whatever count() is called with inside it)
+    while profiling is enabled. Wall time includes nested instrumented calls.
+    Generator functions are timed over all their steps, not including the consumer's time.
+
+    :param name: name in the reports, defaults to module.qualname without the my_utils prefix
+    """
+    if func is None:
+        return functools.partial(instrument, name=name)
+    name = name or _name(func)
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def gen_wrapper(*args, **kwargs):
+            if not _enabled:
+                return (yield from func(*args, **kwargs))
+            it = func(*args, **kwargs)
+            _record(name, calls=1)
+            while True:
+                stack = _stack()
+                stack.append(name)
+                t = time.perf_counter()
+                try:
+                    value = next(it)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    stack.pop()
+                    _record(name, seconds=time.perf_counter() - t)
+                yield value
+
+        return gen_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        stack = _stack()
+        stack.append(name)
+        t = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stack.pop()
+            _record(name, calls=1, seconds=time.perf_counter() - t)
+
+    return wrapper
+
+
+def _diff(after: Dict[str, Dict[str, float]], before: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    diff = {}
+    for name, counters in after.items():
+        prev = before.get(name, {})
+        delta = {counter: value - prev.get(counter, 0) for counter, value in counters.items()}
+        if any(delta.values()):
+            diff[name] = delta
+    return diff
+
+
+def report(stats_: Dict[str, Dict[str, float]] = None) -> str:
+    """Text table of stats (defaults to all the recorded stats), slowest function first."""
+    stats_ = stats() if stats_ is None else stats_
+    if not stats_:
+        return 'no instrumented calls recorded'
+    width = max(len(name) for name in stats_)
+    lines = [f'{"function":<{width}} {"calls":>7} {"total s":>9} {"per call ms":>11} '
+             f'{"read MB":>9} {"written MB":>10} {"s3 reqs":>7}']
+    for name, c in sorted(stats_.items(), key=lambda kv: -kv[1]['seconds']):
+        per_call = c['seconds'] / c['calls'] * 1e3 if c['calls'] else 0
+        lines.append(f'{name:<{width}} {c["calls"]:>7} {c["seconds"]:>9.3f} {per_call:>11.2f} '
+                     f'{c["bytes_read"] / 2 ** 20:>9.1f} {c["bytes_written"] / 2 ** 20:>10.1f} '
+                     f'{c["s3_requests"]:>7}')
+    return '\n'.join(lines)
+
+
+def add_exporter(callback: Callable):
+    """
+    Register callback(stats, label) to send stats to a metrics system. It is called with the
+    breakdown of every cell while %my_utils_profile is on (label 'cell <execution count>'),
+    and by export().
+    """
+    if callback not in _exporters:
+        _exporters.append(callback)
+
+
+def remove_exporter(callback: Callable):
+    if callback in _exporters:
+        _exporters.remove(callback)
+
+
+def export(label: str = 'total'):
+    """Send all the recorded stats to the registered exporters."""
+    _export(stats(), label)
+
+
+def _export(stats_: Dict[str, Dict[str, float]], label: str):
+    for callback in list(_exporters):
+        try:
+            callback(stats_, label)
+        except Exception as e:  # a broken exporter mustn't break the user's cell
+            print(f'my_utils profiling exporter {callback!r} failed: {e}')
+
+
+def _pre_run_cell(*_):
+    global _cell_start
+    _cell_start = stats()
+
+
+def _post_run_cell(result=None):
+    cell = _diff(stats(), _cell_start)
+    if not cell:
+        return
+    print(report(cell))
+    execution_count = getattr(result, 'execution_count', None)
+    _export(cell, f'cell {execution_count}' if execution_count is not None else 'cell')
+
+
+def _set_cell_hooks(ipython, on: bool):
+    for event, callback in (('pre_run_cell', _pre_run_cell), ('post_run_cell', _post_run_cell)):
+        registered = callback in ipython.events.callbacks[event]
+        if on and not registered:
+            ipython.events.register(event, callback)
+        elif not on and registered:
+            ipython.events.unregister(event, callback)
+
+
+def my_utils_profile(line: str = ''):
+    """
+    IPython line magic (registered by main_ext):
+        %my_utils_profile on     enable, print the breakdown of each cell that called instrumented functions
+        %my_utils_profile off    disable (the recorded stats are kept)
+        %my_utils_profile reset  forget the recorded stats
+        %my_utils_profile show   print the totals (default)
+    """
+    command = line.strip() or 'show'
+    from IPython import get_ipython
+    ipython = get_ipython()
+    if command == 'on':
+        enable()
+        if ipython is not None:
+            _set_cell_hooks(ipython, True)
+    elif command == 'off':
+        disable()
+        if ipython is not None:
+            _set_cell_hooks(ipython, False)
+    elif command == 'reset':
+        reset()
+    elif command == 'show':
+        print(report())
+    else:
+        print(my_utils_profile.__doc__)
@@ -1,7 +1,10 @@
 import json
 import yaml
 
+from my_utils.profiling import count_file, instrument
 
+
+@instrument
 def save_json(data: dict, path: str, indent=4, ensure_ascii=False, **kwargs):
     """
     save json file. ensure_ascii=False is useful for saving unicode characters
@@ -9,21 +12,28 @@ def save_json(data: dict, path: str, indent=4, ensure_ascii=False, **kwargs):
     """
     with open(path, 'w') as f:
         json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii, **kwargs)
+    count_file(path, 'bytes_written')
 
 
+@instrument
 def read_json(path: str, **kwargs) -> dict:
+    count_file(path)
     with open(path, 'r') as f:
         return json.load(f, **kwargs)
 
 
+@instrument
 def read_yaml(path: str) -> dict:
+    count_file(path)
     with open(path, 'r') as f:
         return yaml.safe_load(f)
 
 
+@instrument
 def save_yaml(data: dict, path: str, **kwargs):
     with open(path, 'w') as f:
         yaml.dump(data, f, **kwargs)
+    count_file(path, 'bytes_written')
 
 
 def reindent_yaml(path: str):
@@ -35,3 +45,83 @@ def reindent_yaml(path: str):
     """
     yaml_data = read_json(path)
     save_yaml(yaml_data, path)
+
+
+@instrument
+def iter_parquet_chunks(path: str, batch_size: int = 1_000_000, columns: list = None):
+    """
+    Iterate over a parquet file, or a (hive) partitioned parquet folder, as DataFrame chunks
+    of up to batch_size rows without loading all of it to memory.
+    :param path:
+    :param batch_size: max number of rows in a chunk
+    :param columns: columns to read, defaults to all
+    """
+    try:
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError(
+            "This function requires the pyarrow library."
+        ) from e
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    count_file(path)
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        yield batch.to_pandas()
+
+
+@instrument
+def parquet_min_max(path: str, columns: list = None):
+    """
+    min and max of the columns of a parquet file, or a (hive) partitioned parquet folder,
+    from the row group statistics in the file footers - no rows are read.
+    A column without statistics in some row group is read (that column only) to compute its bounds,
+    the bounds of hive partition columns come from the partition values in the file paths.
+    :param path:
+    :param columns: columns to return, defaults to all
+    :return: DataFrame with min and max rows and a column per column
+    """
+    try:
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "This function requires the pyarrow library."
+        ) from e
+    import pandas as pd
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    bounds, no_stats = {}, set()
+
+    def update(name, lo, hi):
+        prev_lo, prev_hi = bounds.get(name, (lo, hi))
+        bounds[name] = (min(prev_lo, lo), max(prev_hi, hi))
+
+    for fragment in dataset.get_fragments():
+        for name, value in ds.get_partition_keys(fragment.partition_expression).items():
+            if value is not None and (columns is None or name in columns):
+                update(name, value, value)
+
+        metadata = pq.ParquetFile(fragment.path).metadata
+        for i_row_group in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i_row_group)
+            for i_col in range(row_group.num_columns):
+                column = row_group.column(i_col)
+                name = column.path_in_schema
+                if columns is not None and name not in columns:
+                    continue
+                stats = column.statistics
+                if stats is None or not stats.has_min_max:
+                    all_null = stats is not None and stats.has_null_count and \
+                               stats.null_count == row_group.num_rows
+                    if not all_null:
+                        no_stats.add(name)
+                    continue
+                update(name, stats.min, stats.max)
+
+    for name in no_stats:
+        result = pc.min_max(dataset.to_table(columns=[name])[name])
+        bounds[name] = (result['min'].as_py(), result['max'].as_py())
+
+    names = columns if columns is not None else [n for n in dataset.schema.names if n in bounds]
+    return pd.DataFrame({name: bounds.get(name, (None, None)) for name in names}, index=['min', 'max'])
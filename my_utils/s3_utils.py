@@ -1,4 +1,8 @@
 
+from my_utils.profiling import count, instrument, watch_s3
+
+
+@instrument
 def modify_yaml_in_s3(bucket_name, key, modify_function):
     """
     Reads a YAML file from S3, modifies it, and writes it back to the same location.
@@ -17,12 +21,13 @@ def modify_yaml_in_s3(bucket_name, key, modify_function):
             "This function requires the boto3 and PyYAML libraries."
         ) from e
 
-    s3 = boto3.client('s3')
+    s3 = watch_s3(boto3.client('s3'))
 
     try:
         # Download the YAML file from S3
         response = s3.get_object(Bucket=bucket_name, Key=key)
         yaml_content = response['Body'].read().decode('utf-8')
+        count(bytes_read=response['ContentLength'])
 
         # Parse the YAML content
         yaml_data = yaml.safe_load(yaml_content)
@@ -35,6 +40,7 @@ def modify_yaml_in_s3(bucket_name, key, modify_function):
 
         # Upload the modified YAML back to S3
         s3.put_object(Bucket=bucket_name, Key=key, Body=modified_yaml_content)
+        count(bytes_written=len(modified_yaml_content.encode('utf-8')))
         print(f"Successfully modified and re-saved {key} in bucket {bucket_name}.")
 
     except NoCredentialsError:
@@ -46,6 +52,7 @@ def modify_yaml_in_s3(bucket_name, key, modify_function):
 
 
 
+@instrument
 def traverse_s3_paths(root_path, num_levels=3):
     """
     Traverses S3 paths starting from root_path, going num_levels levels deep into each folder and
@@ -74,7 +81,7 @@ def traverse_s3_paths(root_path, num_levels=3):
     if not prefix.endswith('/'):
         prefix += '/'
 
-    s3_client = boto3.client('s3')
+    s3_client = watch_s3(boto3.client('s3'))
     result_paths = []
 
     try:
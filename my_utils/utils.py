@@ -1,5 +1,14 @@
-from typing import Optional, Union
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 
@@ -70,10 +79,106 @@ def col_by_kw(df: pd.DataFrame, kw: str):
 
 def grouped(iterable, n=2):
     """
-    Collect data into fixed-length chunks or blocks
+    Collect data into fixed-length chunks or blocks.
+    An incomplete last block is dropped, see iter_chunks for splitting DataFrames and arrays.
     """
     return zip(*[iter(iterable)]*n)
 
+
+def _chunk_bounds(n: int, chunk_size: int = None, n_chunks: int = None) -> List[Tuple[int, int]]:
+    """(start, stop) of consecutive chunks covering range(n)"""
+    if (chunk_size is None) == (n_chunks is None):
+        raise ValueError('Pass exactly one of chunk_size and n_chunks')
+    if n_chunks is not None:
+        edges = np.linspace(0, n, min(n_chunks, n) + 1).astype(int).tolist() if n else [0]
+    else:
+        edges = list(range(0, n, chunk_size)) + [n]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def iter_chunks(data, chunk_size: int = None, n_chunks: int = None):
+    """
+    Split a DataFrame, Series, numpy array or sequence into consecutive chunks of rows,
+    including the shorter tail chunk. DataFrames and Series are sliced with iloc and arrays
+    are sliced into views, so no data is copied.
+    :param chunk_size: rows per chunk
+    :param n_chunks: number of (about equal) chunks, instead of chunk_size
+    """
+    take = data.iloc.__getitem__ if isinstance(data, (pd.DataFrame, pd.Series)) else data.__getitem__
+    for start, stop in _chunk_bounds(len(data), chunk_size, n_chunks):
+        yield take(slice(start, stop))
+
+
+def _call_on_shared_chunk(fn: Callable, shm_name: str, shape: tuple, dtype: str, start: int, stop: int):
+    """Process worker - call fn on rows [start, stop) of an array in shared memory (unlinked by the parent)."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    array = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+    result = fn(array[start:stop])
+    if isinstance(result, np.ndarray) and np.shares_memory(result, array):
+        result = result.copy()
+    del array
+    try:
+        shm.close()
+    except BufferError:  # result still references the shared memory, released with the worker
+        pass
+    return result
+
+
+def _concat_results(results: list):
+    if results and all(isinstance(r, (pd.DataFrame, pd.Series)) for r in results):
+        return pd.concat(results)
+    if results and all(isinstance(r, np.ndarray) and r.ndim > 0 for r in results):
+        return np.concatenate(results)
+    if results and all(isinstance(r, list) for r in results):
+        return list(itertools.chain.from_iterable(results))
+    return results
+
+
+def parallel_map(fn: Callable, data, chunks: int = None, chunk_size: int = None,
+                 backend: str = 'thread', max_workers: int = None):
+    """
+    Apply fn to chunks of data (see iter_chunks) in parallel and reassemble the results in order -
+    concatenated if fn returns DataFrames/Series, numpy arrays or lists,
+    otherwise the list of the results of each chunk.
+
+    Usage example:
+        parallel_map(lambda df: df.apply(parse_row, axis=1), df, chunks=16)
+        parallel_map(expensive_python_fn, np_array, backend='process')
+
+    :param fn: function of a chunk
+    :param data: DataFrame, Series, numpy array or sequence
+    :param chunks: number of chunks, defaults to the number of workers
+    :param chunk_size: rows per chunk, instead of chunks
+    :param backend: 'thread' - for functions that release the GIL (numpy, pandas, I/O),
+                    'process' - for pure python functions. fn must be picklable (defined at module level),
+                    numpy arrays are shared with the workers through shared memory instead of being pickled
+    :param max_workers: defaults to the number of CPUs
+    """
+    max_workers = max_workers or os.cpu_count()
+    if chunks is None and chunk_size is None:
+        chunks = max_workers
+    bounds = _chunk_bounds(len(data), chunk_size, chunks)
+
+    if backend == 'thread':
+        with ThreadPoolExecutor(max_workers) as pool:
+            return _concat_results(list(pool.map(fn, iter_chunks(data, chunk_size, chunks))))
+    if backend != 'process':
+        raise ValueError(f'Unknown backend: {backend}')
+
+    with ProcessPoolExecutor(max_workers) as pool:
+        if not isinstance(data, np.ndarray) or data.dtype.hasobject:
+            return _concat_results(list(pool.map(fn, iter_chunks(data, chunk_size, chunks))))
+
+        shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        try:
+            np.ndarray(data.shape, data.dtype, buffer=shm.buf)[...] = data
+            futures = [pool.submit(_call_on_shared_chunk, fn, shm.name, data.shape, data.dtype.str, start, stop)
+                       for start, stop in bounds]
+            return _concat_results([f.result() for f in futures])
+        finally:
+            shm.close()
+            shm.unlink()
+
 def catboost_feature_importance(model):
     """
     Return a DataFrame with feature importance from a CatBoost model
@@ -82,3 +187,131 @@ def catboost_feature_importance(model):
         'feature': model.feature_names_,
         'importance': model.feature_importances_
     }).sort_values('importance', ascending=False)
+
+
+# extracted feature importances are cached here, one file per model file version
+FEATURE_IMPORTANCE_CACHE_DIR = Path.home() / '.cache' / 'my_utils' / 'feature_importance'
+
+
+def _s3_client(max_pool_connections: int = 10):
+    """
+    S3 client to share between threads - creating clients from the default boto3 session
+    isn't thread safe, using one client is.
+    """
+    try:
+        import boto3
+        from botocore.config import Config
+    except ImportError as e:
+        raise ImportError(
+            "This function requires the boto3 library."
+        ) from e
+    return boto3.session.Session().client('s3', config=Config(max_pool_connections=max_pool_connections))
+
+
+def _model_file_version(path: str, s3_client=None) -> str:
+    """A string that changes when the model file changes - the S3 ETag, or mtime and size"""
+    if path.startswith('s3://'):
+        bucket_name, key = path[5:].split('/', 1)
+        return (s3_client or _s3_client()).head_object(Bucket=bucket_name, Key=key)['ETag']
+    stat = os.stat(path)
+    return f'{stat.st_mtime_ns}_{stat.st_size}'
+
+
+def _load_catboost_model(path: str, s3_client=None):
+    from catboost import CatBoost
+
+    model = CatBoost()
+    if not path.startswith('s3://'):
+        model.load_model(path)
+        return model
+
+    bucket_name, key = path[5:].split('/', 1)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        local_path = os.path.join(tmp_dir, 'model.cbm')
+        (s3_client or _s3_client()).download_file(bucket_name, key, local_path)
+        model.load_model(local_path)
+    return model
+
+
+def _extract_importances(model, cache: bool = True, s3_client=None) -> Tuple[list, np.ndarray]:
+    """
+    (feature names, importances) of a CatBoost model or model file (local or S3).
+    :param s3_client: client to use for S3 paths (share one between threads)
+    """
+    if not isinstance(model, (str, os.PathLike)):
+        return list(model.feature_names_), np.asarray(model.feature_importances_, dtype=float)
+
+    path = str(model)
+    cache_file = None
+    if cache:
+        version = hashlib.sha1(f'{path}|{_model_file_version(path, s3_client)}'.encode()).hexdigest()
+        cache_file = FEATURE_IMPORTANCE_CACHE_DIR / f'{version}.json'
+        if cache_file.exists():
+            with open(cache_file, 'r') as f:
+                cached = json.load(f)
+            return cached['features'], np.asarray(cached['importances'], dtype=float)
+
+    features, importances = _extract_importances(_load_catboost_model(path, s3_client))
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, 'w') as f:
+            json.dump({'path': path, 'features': features, 'importances': importances.tolist()}, f)
+    return features, importances
+
+
+def catboost_feature_importances(models: Union[Dict[str, Any], Iterable], model_file: str = None,
+                                 max_workers: int = 16, cache: bool = True) -> pd.DataFrame:
+    """
+    Feature importance of many CatBoost models as one table - a row per model and a column per feature
+    (NaN where a model doesn't have the feature). Models are loaded in parallel threads and the
+    extracted importances of model files are cached (FEATURE_IMPORTANCE_CACHE_DIR), so repeated
+    analyses don't load the models again.
+
+    Usage example:
+        table = catboost_feature_importances(traverse_s3_paths('bucket/flurry'), model_file='model.cbm')
+        table = catboost_feature_importances(catboost_asset_paths('models'))
+        rank_feature_importances(table)
+
+    :param models: model file paths (local or S3), model objects, or a dict of name -> path/model
+    :param model_file: file name to append to paths of folders (ending with '/')
+    :param max_workers: number of models loaded in parallel
+    :param cache: use and update the importances cache
+    """
+    if not isinstance(models, dict):
+        models = {str(m) if isinstance(m, (str, os.PathLike)) else f'model_{i}': m for i, m in enumerate(models)}
+    sources = []
+    for source in models.values():
+        if isinstance(source, str) and source.endswith('/'):
+            if model_file is None:
+                raise ValueError(f'{source} is a folder, pass the model file name with model_file')
+            source += model_file
+        sources.append(source)
+
+    s3_client = None
+    if any(isinstance(source, str) and source.startswith('s3://') for source in sources):
+        s3_client = _s3_client(max_pool_connections=max_workers)
+    extracted = parallel_map(lambda chunk: [_extract_importances(m, cache, s3_client) for m in chunk], sources,
+                             chunk_size=1, backend='thread', max_workers=max_workers)
+
+    features = pd.Index(pd.unique(np.concatenate([np.asarray(f, dtype=object) for f, _ in extracted]))
+                        if extracted else [])
+    table = np.full((len(extracted), len(features)), np.nan)
+    for row, (names, importances) in enumerate(extracted):
+        table[row, features.get_indexer(names)] = importances
+    return pd.DataFrame(table, index=pd.Index(list(models), name='model'), columns=features)
+
+
+def rank_feature_importances(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate a models x features importance table (see catboost_feature_importances) to a row per
+    feature - mean and std of the importance, mean and median of its rank in each model
+    (1 is the most important) and the number of models using it. Sorted by mean rank.
+    """
+    ranks = table.rank(axis=1, ascending=False)
+    return pd.DataFrame({
+        'mean_importance': table.mean(),
+        'std_importance': table.std(),
+        'mean_rank': ranks.mean(),
+        'median_rank': ranks.median(),
+        'n_models': table.notna().sum()
+    }).sort_values('mean_rank')